@@ -0,0 +1,3 @@
+from alibaba.cli import main
+
+raise SystemExit(main())
@@ -4,19 +4,24 @@ from dataclasses import dataclass, field
 from datetime import datetime
 
 from alibaba.models import PlaylistAnalysis, GroupSelection
-from alibaba.models import ChannelEntry
+from alibaba.models import Playlist
+from alibaba.services.diff import PlaylistDiff
 
 
 @dataclass
 class AppState:
     last_analysis: PlaylistAnalysis | None = None
-    last_entries: list[ChannelEntry] = field(default_factory=list)
+    last_entries: Playlist = field(default_factory=Playlist)
     selection: GroupSelection = field(default_factory=GroupSelection)
+    previous_entries: Playlist | None = None
+    previous_snapshot_id: str | None = None
+    snapshot_id: str | None = None
+    last_diff: PlaylistDiff | None = None
     created_at: datetime = field(default_factory=datetime.now)
     output_ext: str = "m3u"
     output_label: str = "alibaba"
     combine_outputs: bool = True
 
     auto_urls: list[str] = field(default_factory=list)
-    auto_working: list[tuple[str, list[ChannelEntry], datetime | None]] = field(default_factory=list)
+    auto_working: list[tuple[str, Playlist, datetime | None]] = field(default_factory=list)
     auto_country_codes: set[str] = field(default_factory=set)
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+from itertools import chain
+from pathlib import Path
+from typing import Any, Iterator
+
+from alibaba.services.dedup import DEDUP_KEYS, DEFAULT_DEDUP_KEYS, dedup_playlists
+from alibaba.services.diff import diff_playlists, scan_changes
+from alibaba.services.index import ensure_index
+from alibaba.models import Playlist
+from alibaba.services.iptv import IPTVService
+from alibaba.services.liveness import apply_liveness, scan_liveness
+from alibaba.services.m3u import filter_by_country_codes, iter_by_country_codes
+from alibaba.services.metrics import MetricsLog, metrics_enabled
+from alibaba.services.output import OutputJob, write_outputs
+from alibaba.services.storage import StorageService
+from alibaba.services.transport import TransportConfig
+from alibaba.services.url_finder import iter_text_chunks, iter_urls
+from alibaba.utils.progress import ProgressSnapshot, ProgressTracker, thread_schedule
+
+
+def _default_data_dir() -> Path:
+    return Path.home() / ".alibaba"
+
+
+def _read_input(path: str | None) -> str:
+    if not path or path == "-":
+        return sys.stdin.read()
+    return Path(path).read_text(encoding="utf-8", errors="replace")
+
+
+def _input_urls(path: str | None) -> Iterator[str]:
+    if not path or path == "-":
+        yield from iter_urls(iter_text_chunks(sys.stdin))
+        return
+    with open(path, encoding="utf-8", errors="replace") as fp:
+        yield from iter_urls(iter_text_chunks(fp))
+
+
+def _progress_printer(quiet: bool) -> ProgressTracker | None:
+    if quiet:
+        return None
+    tty = sys.stderr.isatty()
+    lock = threading.Lock()
+
+    def _print(snap: ProgressSnapshot) -> None:
+        line = f"{int(snap.progress * 100):3d}% {snap.message}"
+        if snap.eta_text and snap.progress < 1.0:
+            line += f" ({snap.eta_text})"
+        with lock:
+            if tty:
+                sys.stderr.write("\r\033[K" + line)
+            else:
+                sys.stderr.write(line + "\n")
+            sys.stderr.flush()
+
+    return ProgressTracker(_print, schedule=thread_schedule, frame_s=0.1 if tty else 1.0)
+
+
+def _end_progress(progress: ProgressTracker | None) -> None:
+    if progress is None:
+        return
+    snap = progress.close()
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+    stages = ", ".join(f"{k} {v:.1f} sn" for k, v in snap.stages.items() if k and v >= 0.05)
+    if stages:
+        sys.stderr.write(f"Süreler: {stages}\n")
+
+
+def _split_values(values: list[str] | None) -> set[str]:
+    out: set[str] = set()
+    for v in values or []:
+        out.update(p.strip() for p in v.split(",") if p.strip())
+    return out
+
+
+def _metrics_log(args: argparse.Namespace) -> MetricsLog | None:
+    if args.metrics is None and not metrics_enabled():
+        return None
+    return MetricsLog(Path(args.metrics or Path(args.data_dir) / "metrics.jsonl"))
+
+
+def _services(args: argparse.Namespace) -> tuple[IPTVService, StorageService]:
+    storage = StorageService(app_name="AliBaba", data_dir=args.data_dir, output_dir=args.out)
+    metrics_log = _metrics_log(args)
+    iptv = IPTVService(
+        cache=None if args.no_cache else storage.playlist_cache(),
+        probe_cache=None if args.no_cache else storage.probe_cache(),
+        transport=TransportConfig(
+            pool_maxsize=args.pool_size,
+            max_retries=args.retries,
+            async_concurrency=args.concurrency,
+        ),
+        backend=args.backend,
+        collect_metrics=metrics_log is not None,
+        metrics_log=metrics_log,
+    )
+    return iptv, storage
+
+
+def _deep_scan(iptv: IPTVService, playlist: Playlist, args: argparse.Namespace, **delta: Any) -> Playlist:
+    if not args.deep_scan or not playlist:
+        return playlist
+    progress = _progress_printer(args.quiet)
+    scan_kw = dict(
+        timeout_s=args.scan_timeout,
+        deadline_s=args.scan_deadline,
+        concurrency=args.scan_concurrency,
+        per_host=args.scan_per_host,
+        on_progress=progress,
+    )
+    if delta and not args.mark_dead:
+        out, report = scan_changes(iptv, playlist=playlist, **delta, **scan_kw)
+    else:
+        report = scan_liveness(iptv, playlist, **scan_kw)
+        out = apply_liveness(playlist, report, "mark" if args.mark_dead else "drop")
+    _end_progress(progress)
+    print(f"Canlılık: {report.summary()}", file=sys.stderr)
+    for line in report.group_lines():
+        print(f"  {line}", file=sys.stderr)
+    return out
+
+
+def cmd_extract(args: argparse.Namespace) -> int:
+    found = 0
+    for u in _input_urls(args.input):
+        print(u)
+        found += 1
+    return 0 if found else 1
+
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    iptv, _ = _services(args)
+    progress = _progress_printer(args.quiet)
+    analysis, entries = iptv.analyze_playlist(args.url, on_progress=progress, xtream=args.xtream)
+    _end_progress(progress)
+    print(f"url: {analysis.source_url}")
+    print(f"source: {'xtream' if analysis.xtream is not None else 'm3u'}")
+    print(f"fetched_ok: {analysis.fetched_ok}")
+    print(f"parsed_ok: {analysis.parsed_ok}")
+    print(f"channels: {analysis.channel_count if analysis.xtream is None else '-'}")
+    print(f"expiry: {analysis.expiry.isoformat() if analysis.expiry else '-'}")
+    m = analysis.metrics
+    if m is not None:
+        lat = sorted(m.probe_latencies_ms)
+        print(
+            f"metrics: source={m.source} cache={m.playlist_cache} bytes={m.download_bytes} download={m.download_s:.2f}s "
+            f"parse={m.parse_s:.2f}s rate={m.entries_per_s:,.0f}/s probes={m.probe_ok}/{m.probe_count} "
+            f"probe_cache={m.probe_cache_hits} probe_p50={lat[len(lat) // 2] if lat else 0:.0f}ms"
+        )
+    if analysis.xtream is not None:
+        for g in analysis.groups:
+            print(f"group: {g}")
+    elif entries:
+        idx = ensure_index(entries)
+        for g in analysis.groups:
+            print(f"group: {g}\t{idx.count(g)}")
+    return 0 if analysis.fetched_ok and analysis.parsed_ok else 1
+
+
+def cmd_manual(args: argparse.Namespace) -> int:
+    iptv, storage = _services(args)
+    groups = {g.strip() for g in args.group or [] if g.strip()}
+    if args.groups_file:
+        groups.update(ln.strip() for ln in _read_input(args.groups_file).splitlines() if ln.strip())
+    if not groups:
+        print("En az 1 grup gerekli (--group / --groups-file).", file=sys.stderr)
+        return 2
+
+    progress = _progress_printer(args.quiet)
+    analysis, entries = iptv.analyze_playlist(args.url, on_progress=progress, xtream=args.xtream)
+    _end_progress(progress)
+    filtered = iptv.load_groups(analysis, entries, groups)
+    if not filtered:
+        print("Seçili gruplarda kanal bulunamadı.", file=sys.stderr)
+        return 1
+
+    current = entries if analysis.xtream is None else filtered
+    snapshots = storage.snapshot_store()
+    previous, previous_id = snapshots.load_versioned(args.url) or (None, None)
+    snapshot_id = snapshots.save(args.url, current)
+    diff = None
+    if previous is not None:
+        diff = diff_playlists(previous, current, groups)
+        print(f"Değişiklik: {diff.summary()}", file=sys.stderr)
+        if diff.is_empty and args.skip_unchanged:
+            print("Seçili gruplarda değişiklik yok, dosya yazılmadı.", file=sys.stderr)
+            return 0
+
+    filtered = _deep_scan(
+        iptv,
+        filtered,
+        args,
+        store=snapshots,
+        source_url=args.url,
+        groups=groups,
+        current=current,
+        diff=diff,
+        base_id=previous_id,
+        snapshot_id=snapshot_id,
+    )
+    if not filtered:
+        print("Canlı kanal bulunamadı.", file=sys.stderr)
+        return 1
+    res = storage.save_chunks(iptv.m3u_plus_chunks(filtered), label=args.label, ext=args.ext, expiry=analysis.expiry)
+    print(res.file_path)
+    return 0
+
+
+def cmd_auto(args: argparse.Namespace) -> int:
+    iptv, storage = _services(args)
+    codes = {c.upper() for c in _split_values(args.codes)}
+    urls = list(_input_urls(args.input))
+    if not urls:
+        print("Metinden IPTV linki bulunamadı.", file=sys.stderr)
+        return 1
+
+    progress = _progress_printer(args.quiet)
+    results = iptv.analyze_many(
+        urls,
+        on_progress=progress,
+        max_workers=args.workers,
+        per_host=args.per_host,
+        timeout_budget_s=args.budget,
+        fingerprint_kb=args.fingerprint_kb,
+    )
+    _end_progress(progress)
+    working = [(r.url, r.entries, r.analysis.expiry) for r in results if r.ok and r.duplicate_of is None]
+    for r in results:
+        if r.duplicate_of is not None:
+            print(f"DUP\t{r.url}\t= {r.duplicate_of}", file=sys.stderr)
+            continue
+        status = "OK" if r.ok else (r.error or "FAIL")
+        print(f"{status}\t{r.url}", file=sys.stderr)
+
+    if not working:
+        print("Çalışan link bulunamadı.", file=sys.stderr)
+        return 1
+
+    if not codes:
+        found: set[str] = set()
+        for _, entries, _ in working:
+            found.update(ensure_index(entries).country_codes())
+        print("Ülke kodları: " + ", ".join(sorted(found)))
+        return 0
+
+    jobs: list[OutputJob] = []
+    if args.combine:
+        expiries = [expiry for _, _, expiry in working if expiry]
+        if args.dedup:
+            per_source = [filter_by_country_codes(entries, codes) for _, entries, _ in working]
+            unique, report = dedup_playlists(per_source, keys=tuple(args.dedup_key or DEFAULT_DEDUP_KEYS), probe_cache=iptv.probe_cache)
+            print(report.summary(), file=sys.stderr)
+            rows = chain.from_iterable(unique)
+        else:
+            rows = chain.from_iterable(iter_by_country_codes(entries, codes) for _, entries, _ in working)
+        if args.deep_scan:
+            rows = _deep_scan(iptv, Playlist.from_entries(rows), args)
+        jobs.append(OutputJob(label=f"{args.label}_auto", entries=rows, expiry=min(expiries) if expiries else None))
+    else:
+        for i, (_, entries, expiry) in enumerate(working, start=1):
+            filtered = _deep_scan(iptv, filter_by_country_codes(entries, codes), args)
+            jobs.append(OutputJob(label=f"{args.label}_{i}", entries=filtered, expiry=expiry))
+
+    progress = _progress_printer(args.quiet)
+    saved = write_outputs(storage, jobs, args.ext, on_progress=progress, max_workers=args.workers)
+    _end_progress(progress)
+    for res in saved:
+        print(res.file_path)
+    return 0 if saved else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data-dir", default=str(_default_data_dir()), help="cache ve sürüm durumu klasörü")
+    common.add_argument("--out", default=None, help="çıktı klasörü (varsayılan: Downloads/iptv dosyalari)")
+    common.add_argument("--no-cache", action="store_true", help="playlist ve probe önbelleğini kullanma")
+    common.add_argument(
+        "--metrics",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="JSONL",
+        help="analiz ölçümlerini JSON-lines olarak kaydet (varsayılan: <data-dir>/metrics.jsonl, ya da ALIBABA_METRICS=1)",
+    )
+    common.add_argument("-q", "--quiet", action="store_true", help="ilerleme çıktısını gizle")
+    common.add_argument("--pool-size", type=int, default=16, help="host başına bağlantı havuzu")
+    common.add_argument("--retries", type=int, default=2, help="playlist indirme yeniden deneme sayısı")
+    common.add_argument(
+        "--backend",
+        choices=["requests", "asyncio"],
+        default="requests",
+        help="ağ katmanı (asyncio: tek thread'de çok sayıda eşzamanlı test)",
+    )
+    common.add_argument("--concurrency", type=int, default=200, help="asyncio backend'de eşzamanlı test sayısı")
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--ext", choices=["m3u", "m3u8"], default="m3u")
+    output.add_argument("--label", default="alibaba")
+
+    p = argparse.ArgumentParser(prog="alibaba", description="AliBaba IPTV Grup Editör (konsol)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    sp = sub.add_parser("extract", parents=[common], help="metinden IPTV linklerini çıkar")
+    sp.add_argument("input", nargs="?", default="-", help="metin dosyası (varsayılan: stdin)")
+    sp.set_defaults(func=cmd_extract)
+
+    scan = argparse.ArgumentParser(add_help=False)
+    scan.add_argument("--deep-scan", action="store_true", help="seçilen tüm kanalları test et, ölüleri çıkar")
+    scan.add_argument("--mark-dead", action="store_true", help="ölü kanalları çıkarmak yerine adlarını işaretle")
+    scan.add_argument("--scan-deadline", type=float, default=300.0, help="canlılık testi toplam süre sınırı (sn)")
+    scan.add_argument("--scan-concurrency", type=int, default=64, help="eşzamanlı kanal testi")
+    scan.add_argument("--scan-per-host", type=int, default=16, help="host başına eşzamanlı kanal testi")
+    scan.add_argument("--scan-timeout", type=int, default=5, help="kanal başına zaman aşımı (sn)")
+
+    xtream = argparse.ArgumentParser(add_help=False)
+    xtream.add_argument(
+        "--xtream",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="get.php linklerinde player_api.php ile yalnızca kategori/hesap bilgisini al, kanalları seçilen gruplar için indir",
+    )
+
+    sp = sub.add_parser("analyze", parents=[common, xtream], help="tek linki analiz et ve grupları listele")
+    sp.add_argument("url")
+    sp.set_defaults(func=cmd_analyze)
+
+    sp = sub.add_parser("manual", parents=[common, output, xtream, scan], help="seçili gruplarla yeni playlist oluştur")
+    sp.add_argument("url")
+    sp.add_argument("-g", "--group", action="append", help="grup adı (tekrarlanabilir)")
+    sp.add_argument("--groups-file", default=None, help="her satırda bir grup adı")
+    sp.add_argument("--skip-unchanged", action="store_true", help="seçili gruplar öncekiyle aynıysa yeni sürüm yazma")
+    sp.set_defaults(func=cmd_manual)
+
+    sp = sub.add_parser("auto", parents=[common, output, scan], help="metindeki linkleri test et ve ülke koduna göre filtrele")
+    sp.add_argument("input", nargs="?", default="-", help="metin dosyası (varsayılan: stdin)")
+    sp.add_argument("-c", "--codes", action="append", help="ülke kodları (ör: TR,DE)")
+    sp.add_argument("--combine", action=argparse.BooleanOptionalAction, default=True, help="tek dosyada birleştir")
+    sp.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=True, help="birleşik çıktıda tekrar eden kanalları at")
+    sp.add_argument(
+        "--dedup-key",
+        action="append",
+        choices=DEDUP_KEYS,
+        help=f"tekrar anahtarı, birden çok verilebilir (varsayılan: {', '.join(DEFAULT_DEDUP_KEYS)})",
+    )
+    sp.add_argument("--workers", type=int, default=8)
+    sp.add_argument("--per-host", type=int, default=2)
+    sp.add_argument("--budget", type=float, default=None, help="toplam süre sınırı (sn)")
+    sp.add_argument(
+        "--fingerprint-kb",
+        type=int,
+        default=256,
+        help="aynı içerikli listeleri ilk N KB'den tanı ve tekrar indirme (0: kapalı)",
+    )
+    sp.set_defaults(func=cmd_auto)
+
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Hata: {e or type(e).__name__}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import re
+from array import array
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Iterable
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from alibaba.services.index import PlaylistIndex
+    from alibaba.services.xtream import XtreamSource
 
 
 @dataclass(frozen=True)
@@ -13,6 +19,454 @@ class ChannelEntry:
     tvg_id: str | None = None
     tvg_name: str | None = None
     tvg_logo: str | None = None
+    extinf: str | None = None
+    extras: str = ""
+
+    @property
+    def attrs(self) -> dict[str, str]:
+        return extinf_attrs(self.extinf, self.tvg_id, self.tvg_name, self.tvg_logo, self.group)
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    ok: bool
+    status_code: int | None
+    latency_s: float | None = None
+    from_cache: bool = False
+
+
+_ATTR_RE = re.compile(r"(\w[\w-]*)=\"([^\"]*)\"")
+_NONE = -1
+_SAME_AS_NAME = -2
+_BLOCK = 1024
+
+
+def _extinf_template(
+    head: str, tvg_id: str | None, tvg_name: str | None, tvg_logo: str | None, group: str | None
+) -> str:
+    if group:
+        head = head.replace(f'group-title="{group}"', 'group-title="\x04"')
+    if tvg_logo:
+        head = head.replace(f'tvg-logo="{tvg_logo}"', 'tvg-logo="\x03"')
+    if tvg_name:
+        head = head.replace(f'tvg-name="{tvg_name}"', 'tvg-name="\x02"')
+    if tvg_id:
+        head = head.replace(f'tvg-id="{tvg_id}"', 'tvg-id="\x01"')
+    return head
+
+
+def render_extinf(
+    template: str, tvg_id: str | None, tvg_name: str | None, tvg_logo: str | None, group: str | None
+) -> str:
+    if "\x04" in template:
+        template = template.replace("\x04", group or "")
+    if "\x03" in template:
+        template = template.replace("\x03", tvg_logo or "")
+    if "\x02" in template:
+        template = template.replace("\x02", tvg_name or "")
+    if "\x01" in template:
+        template = template.replace("\x01", tvg_id or "")
+    return template
+
+
+def extinf_attrs(
+    extinf: str | None, tvg_id: str | None, tvg_name: str | None, tvg_logo: str | None, group: str | None
+) -> dict[str, str]:
+    if extinf:
+        return dict(_ATTR_RE.findall(extinf))
+    fields = (("tvg-id", tvg_id), ("tvg-name", tvg_name), ("tvg-logo", tvg_logo), ("group-title", group))
+    return {k: v for k, v in fields if v}
+
+
+class StringPool:
+    __slots__ = ("values", "_ids")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = list(values)
+        self._ids: dict[str, int] | None = None
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return _NONE
+        if self._ids is None:
+            self._ids = {v: i for i, v in enumerate(self.values)}
+        i = self._ids.get(value)
+        if i is None:
+            i = len(self.values)
+            self.values.append(value)
+            self._ids[value] = i
+        return i
+
+    def get(self, i: int) -> str | None:
+        return None if i < 0 else self.values[i]
+
+    def compact(self) -> None:
+        self._ids = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TextColumn:
+    __slots__ = ("_blocks", "_ends", "_pending", "_pos")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._blocks: list[str] = []
+        self._ends = array("I")
+        self._pending: list[str] = []
+        self._pos = 0
+        self.extend(values)
+
+    def append(self, value: str) -> None:
+        self._pending.append(value)
+        self._pos += len(value)
+        self._ends.append(self._pos)
+        if len(self._pending) == _BLOCK:
+            self._blocks.append("".join(self._pending))
+            self._pending = []
+            self._pos = 0
+
+    def extend(self, values: Iterable[str]) -> None:
+        pending = self._pending
+        ends = self._ends
+        pos = self._pos
+        for v in values:
+            pending.append(v)
+            pos += len(v)
+            ends.append(pos)
+            if len(pending) == _BLOCK:
+                self._blocks.append("".join(pending))
+                pending = self._pending = []
+                pos = 0
+        self._pos = pos
+
+    def gather(self, indices: Iterable[int]) -> Iterator[str]:
+        blocks = self._blocks
+        ends = self._ends
+        pending = self._pending
+        full = len(blocks) * _BLOCK
+        for i in indices:
+            if i >= full:
+                yield pending[i - full]
+                continue
+            off = i % _BLOCK
+            yield blocks[i // _BLOCK][ends[i - 1] if off else 0 : ends[i]]
+
+    def __getitem__(self, i: int) -> str:
+        b, off = divmod(i, _BLOCK)
+        if b >= len(self._blocks):
+            return self._pending[off]
+        start = self._ends[i - 1] if off else 0
+        return self._blocks[b][start : self._ends[i]]
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __iter__(self) -> Iterator[str]:
+        for b, block in enumerate(self._blocks):
+            start = 0
+            for end in self._ends[b * _BLOCK : (b + 1) * _BLOCK]:
+                yield block[start:end]
+                start = end
+        yield from self._pending
+
+
+class ChannelRow:
+    __slots__ = ("_pl", "_i")
+
+    def __init__(self, playlist: Playlist, index: int):
+        self._pl = playlist
+        self._i = index
+
+    @property
+    def index(self) -> int:
+        return self._i
+
+    @property
+    def name(self) -> str:
+        return self._pl.names[self._i]
+
+    @property
+    def url(self) -> str:
+        return self._pl.url_of(self._i)
+
+    @property
+    def group(self) -> str | None:
+        return self._pl.groups.get(self._pl.group_ids[self._i])
+
+    @property
+    def tvg_id(self) -> str | None:
+        return self._pl.tvg_ids[self._i] or None
+
+    @property
+    def tvg_name(self) -> str | None:
+        i = self._pl.tvg_name_ids[self._i]
+        if i == _SAME_AS_NAME:
+            return self.name
+        return self._pl.strings.get(i)
+
+    @property
+    def tvg_logo(self) -> str | None:
+        pl = self._pl
+        prefix = pl.strings.get(pl.logo_prefix_ids[self._i])
+        if prefix is None:
+            return None
+        return prefix + pl.logo_suffixes[self._i]
+
+    @property
+    def extinf(self) -> str | None:
+        template = self._pl.strings.get(self._pl.extinf_ids[self._i])
+        if template is None:
+            return None
+        return render_extinf(template, self.tvg_id, self.tvg_name, self.tvg_logo, self.group)
+
+    @property
+    def extras(self) -> str:
+        return self._pl.strings.get(self._pl.extras_ids[self._i]) or ""
+
+    @property
+    def attrs(self) -> dict[str, str]:
+        return extinf_attrs(self.extinf, self.tvg_id, self.tvg_name, self.tvg_logo, self.group)
+
+    def to_entry(self) -> ChannelEntry:
+        return ChannelEntry(
+            name=self.name,
+            url=self.url,
+            group=self.group,
+            tvg_id=self.tvg_id,
+            tvg_name=self.tvg_name,
+            tvg_logo=self.tvg_logo,
+            extinf=self.extinf,
+            extras=self.extras,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChannelRow):
+            return self.to_entry() == other.to_entry()
+        if isinstance(other, ChannelEntry):
+            return self.to_entry() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.to_entry())
+
+    def __repr__(self) -> str:
+        return f"ChannelRow({self._i}, {self.to_entry()!r})"
+
+
+class Playlist:
+    __slots__ = (
+        "groups",
+        "strings",
+        "names",
+        "url_prefix_ids",
+        "url_suffixes",
+        "group_ids",
+        "tvg_ids",
+        "tvg_name_ids",
+        "logo_prefix_ids",
+        "logo_suffixes",
+        "extinf_ids",
+        "extras_ids",
+        "header",
+        "index",
+    )
+
+    def __init__(self, groups: StringPool | None = None, strings: StringPool | None = None):
+        self.groups = groups if groups is not None else StringPool()
+        self.strings = strings if strings is not None else StringPool()
+        self.names = TextColumn()
+        self.url_prefix_ids = array("i")
+        self.url_suffixes = TextColumn()
+        self.group_ids = array("i")
+        self.tvg_ids = TextColumn()
+        self.tvg_name_ids = array("i")
+        self.logo_prefix_ids = array("i")
+        self.logo_suffixes = TextColumn()
+        self.extinf_ids = array("i")
+        self.extras_ids = array("i")
+        self.header: str | None = None
+        self.index: PlaylistIndex | None = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Any]) -> Playlist:
+        pl = cls()
+        pl.extend(entries)
+        return pl
+
+    def append(
+        self,
+        name: str,
+        url: str,
+        group: str | None = None,
+        tvg_id: str | None = None,
+        tvg_name: str | None = None,
+        tvg_logo: str | None = None,
+        extinf: str | None = None,
+        extras: str = "",
+    ) -> None:
+        strings = self.strings
+        self.index = None
+        self.names.append(name)
+        cut = url.rfind("/") + 1
+        self.url_prefix_ids.append(strings.intern(url[:cut]))
+        self.url_suffixes.append(url[cut:])
+        self.group_ids.append(self.groups.intern(group))
+        self.tvg_ids.append(tvg_id or "")
+        if tvg_name is not None and tvg_name == name:
+            self.tvg_name_ids.append(_SAME_AS_NAME)
+        else:
+            self.tvg_name_ids.append(strings.intern(tvg_name))
+        if tvg_logo is None:
+            self.logo_prefix_ids.append(_NONE)
+            self.logo_suffixes.append("")
+        else:
+            cut = tvg_logo.rfind("/") + 1
+            self.logo_prefix_ids.append(strings.intern(tvg_logo[:cut]))
+            self.logo_suffixes.append(tvg_logo[cut:])
+        if extinf:
+            self.extinf_ids.append(strings.intern(_extinf_template(extinf, tvg_id, tvg_name, tvg_logo, group)))
+        else:
+            self.extinf_ids.append(_NONE)
+        self.extras_ids.append(strings.intern(extras) if extras else _NONE)
+
+    def extend(self, entries: Iterable[Any]) -> None:
+        if isinstance(entries, Playlist) and entries.groups is self.groups and entries.strings is self.strings:
+            self._copy_rows(entries, range(len(entries)))
+            return
+        for e in entries:
+            self.append(
+                e.name, e.url, e.group, e.tvg_id, e.tvg_name, e.tvg_logo, getattr(e, "extinf", None), getattr(e, "extras", "")
+            )
+
+    def _copy_rows(self, src: Playlist, indices: Iterable[int]) -> None:
+        self.index = None
+        if not isinstance(indices, (list, range, array)):
+            indices = list(indices)
+        for name in ("url_prefix_ids", "group_ids", "tvg_name_ids", "logo_prefix_ids", "extinf_ids", "extras_ids"):
+            getattr(self, name).extend(map(getattr(src, name).__getitem__, indices))
+        for name in ("names", "url_suffixes", "tvg_ids", "logo_suffixes"):
+            getattr(self, name).extend(getattr(src, name).gather(indices))
+
+    def take(self, indices: Iterable[int]) -> Playlist:
+        out = Playlist(groups=self.groups, strings=self.strings)
+        out.header = self.header
+        out._copy_rows(self, indices)
+        return out
+
+    def rows(self, indices: Iterable[int]) -> Iterator[ChannelRow]:
+        for i in indices:
+            yield ChannelRow(self, i)
+
+    def url_of(self, i: int) -> str:
+        return self.strings.values[self.url_prefix_ids[i]] + self.url_suffixes[i]
+
+    def group_of(self, i: int) -> str | None:
+        return self.groups.get(self.group_ids[i])
+
+    def iter_url_signatures(self) -> Iterator[tuple[str, int]]:
+        gv = self.groups.values
+        sv = self.strings.values
+        cols = zip(
+            self.names,
+            self.url_prefix_ids,
+            self.url_suffixes,
+            self.group_ids,
+            self.tvg_ids,
+            self.tvg_name_ids,
+            self.logo_prefix_ids,
+            self.logo_suffixes,
+        )
+        for name, up, us, gid, tvg_id, tn, lp, ls in cols:
+            tvg_name = name if tn == _SAME_AS_NAME else (sv[tn] if tn >= 0 else None)
+            logo = sv[lp] + ls if lp >= 0 else None
+            yield sv[up] + us, hash((name, gv[gid] if gid >= 0 else None, tvg_id, tvg_name, logo))
+
+    def iter_records(self) -> Iterator[tuple[str, str, str | None, str]]:
+        gv = self.groups.values
+        sv = self.strings.values
+        cols = zip(
+            self.names,
+            self.url_prefix_ids,
+            self.url_suffixes,
+            self.group_ids,
+            self.tvg_ids,
+            self.tvg_name_ids,
+            self.logo_prefix_ids,
+            self.logo_suffixes,
+            self.extinf_ids,
+            self.extras_ids,
+        )
+        for name, up, us, gid, tvg_id, tn, lp, ls, hid, xid in cols:
+            head = None
+            if hid >= 0:
+                tvg_name = name if tn == _SAME_AS_NAME else (sv[tn] if tn >= 0 else None)
+                logo = sv[lp] + ls if lp >= 0 else None
+                head = render_extinf(sv[hid], tvg_id, tvg_name, logo, gv[gid] if gid >= 0 else None)
+            yield name, sv[up] + us, head, sv[xid] if xid >= 0 else ""
+
+    def compact(self) -> None:
+        self.groups.compact()
+        self.strings.compact()
+
+    def to_columns(self) -> dict[str, Any]:
+        return {
+            "groups": self.groups.values,
+            "strings": self.strings.values,
+            "names": list(self.names),
+            "url_prefix_ids": self.url_prefix_ids.tolist(),
+            "url_suffixes": list(self.url_suffixes),
+            "group_ids": self.group_ids.tolist(),
+            "tvg_ids": list(self.tvg_ids),
+            "tvg_name_ids": self.tvg_name_ids.tolist(),
+            "logo_prefix_ids": self.logo_prefix_ids.tolist(),
+            "logo_suffixes": list(self.logo_suffixes),
+            "extinf_ids": self.extinf_ids.tolist(),
+            "extras_ids": self.extras_ids.tolist(),
+            "header": self.header,
+        }
+
+    @classmethod
+    def from_columns(cls, cols: dict[str, Any]) -> Playlist:
+        pl = cls(groups=StringPool(cols["groups"]), strings=StringPool(cols["strings"]))
+        pl.names = TextColumn(cols["names"])
+        pl.url_prefix_ids = array("i", cols["url_prefix_ids"])
+        pl.url_suffixes = TextColumn(cols["url_suffixes"])
+        pl.group_ids = array("i", cols["group_ids"])
+        pl.tvg_ids = TextColumn(cols["tvg_ids"])
+        pl.tvg_name_ids = array("i", cols["tvg_name_ids"])
+        pl.logo_prefix_ids = array("i", cols["logo_prefix_ids"])
+        pl.logo_suffixes = TextColumn(cols["logo_suffixes"])
+        n = len(pl.names)
+        pl.extinf_ids = array("i", cols.get("extinf_ids") or [_NONE] * n)
+        pl.extras_ids = array("i", cols.get("extras_ids") or [_NONE] * n)
+        pl.header = cols.get("header")
+        if any(len(c) != n for c in (pl.url_prefix_ids, pl.group_ids, pl.tvg_ids, pl.logo_suffixes, pl.extinf_ids, pl.extras_ids)):
+            raise ValueError("inconsistent playlist columns")
+        return pl
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __bool__(self) -> bool:
+        return len(self.names) > 0
+
+    def __iter__(self) -> Iterator[ChannelRow]:
+        for i in range(len(self.names)):
+            yield ChannelRow(self, i)
+
+    def __getitem__(self, key: int | slice) -> ChannelRow | Playlist:
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(len(self.names))))
+        n = len(self.names)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("playlist index out of range")
+        return ChannelRow(self, key)
+
+    def __repr__(self) -> str:
+        return f"Playlist({len(self.names)} entries, {len(self.groups)} groups)"
 
 
 @dataclass
@@ -23,6 +477,39 @@ class PlaylistAnalysis:
     channel_count: int
     groups: list[str]
     expiry: datetime | None = None
+    metrics: AnalysisMetrics | None = None
+    xtream: XtreamSource | None = None
+
+
+@dataclass
+class AnalysisMetrics:
+    source_url: str
+    backend: str = "requests"
+    source: str = "m3u"
+    started_at: float = 0.0
+    playlist_cache: str = "off"
+    download_bytes: int = 0
+    download_s: float = 0.0
+    parse_s: float = 0.0
+    entries: int = 0
+    entries_per_s: float = 0.0
+    probe_count: int = 0
+    probe_ok: int = 0
+    probe_cache_hits: int = 0
+    probe_latencies_ms: list[float] = field(default_factory=list)
+    total_s: float = 0.0
+    error: str | None = None
+
+    def record_probe(self, pr: ProbeResult) -> None:
+        self.probe_count += 1
+        self.probe_ok += pr.ok
+        if pr.from_cache:
+            self.probe_cache_hits += 1
+        elif pr.latency_s is not None:
+            self.probe_latencies_ms.append(round(pr.latency_s * 1000, 1))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
 
 
 @dataclass
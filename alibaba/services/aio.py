@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+import queue
+import ssl
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator
+from urllib.parse import urljoin, urlsplit
+
+from alibaba.models import ProbeResult
+from alibaba.services.probe_cache import host_of
+
+if TYPE_CHECKING:
+    from alibaba.services.transport import DnsCache
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+_DONE = object()
+
+
+class HTTPStatusError(IOError):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"{status} Error for url: {url}")
+        self.status = status
+        self.url = url
+
+
+class Headers(dict):
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+
+@dataclass
+class AioResponse:
+    url: str
+    status: int
+    headers: Headers
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    bytes_read: int = 0
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:  # noqa: BLE001
+            pass
+
+    async def iter_raw(self, read_timeout: float) -> AsyncIterator[bytes]:
+        te = self.headers.get("transfer-encoding", "").lower()
+        length = self.headers.get("content-length")
+        r = self.reader
+        if "chunked" in te:
+            while True:
+                size_line = await asyncio.wait_for(r.readline(), read_timeout)
+                if not size_line:
+                    raise IOError(f"Bağlantı erken kapandı: {self.url}")
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    await asyncio.wait_for(r.readline(), read_timeout)
+                    return
+                try:
+                    chunk = await asyncio.wait_for(r.readexactly(size), read_timeout)
+                except asyncio.IncompleteReadError as e:
+                    raise IOError(f"Bağlantı erken kapandı: {self.url}") from e
+                self.bytes_read += size
+                yield chunk
+                await asyncio.wait_for(r.readline(), read_timeout)
+        elif length is not None:
+            remaining = int(length)
+            while remaining > 0:
+                chunk = await asyncio.wait_for(r.read(min(remaining, 64 * 1024)), read_timeout)
+                if not chunk:
+                    raise IOError(f"Bağlantı erken kapandı: {remaining} bayt eksik ({self.url})")
+                remaining -= len(chunk)
+                self.bytes_read += len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await asyncio.wait_for(r.read(64 * 1024), read_timeout)
+                if not chunk:
+                    return
+                self.bytes_read += len(chunk)
+                yield chunk
+
+    async def iter_lines(self, read_timeout: float) -> AsyncIterator[str]:
+        enc = self.headers.get("content-encoding", "").lower()
+        if enc == "gzip":
+            dec = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif enc == "deflate":
+            dec = zlib.decompressobj()
+        else:
+            dec = None
+        text = codecs.getincrementaldecoder(_charset(self.headers) or "utf-8")(errors="replace")
+        buf = ""
+        async for chunk in self.iter_raw(read_timeout):
+            if dec is not None:
+                chunk = dec.decompress(chunk)
+            buf += text.decode(chunk)
+            if "\n" not in buf and "\r" not in buf:
+                continue
+            lines = buf.splitlines(keepends=True)
+            buf = lines.pop() if not lines[-1].endswith(("\n", "\r")) else ""
+            for ln in lines:
+                yield ln.rstrip("\r\n")
+        if dec is not None and not dec.eof:
+            raise IOError(f"Sıkıştırılmış gövde eksik: {self.url}")
+        tail = text.decode(dec.flush() if dec is not None else b"", final=True)
+        buf += tail
+        for ln in buf.splitlines():
+            yield ln
+
+
+def _charset(headers: dict[str, str]) -> str | None:
+    ctype = headers.get("content-type", "")
+    for part in ctype.split(";")[1:]:
+        k, _, v = part.strip().partition("=")
+        if k.lower() == "charset" and v:
+            return v.strip('"')
+    return None
+
+
+class AsyncHTTPClient:
+    def __init__(
+        self,
+        user_agent: str = "AliBaba/1.0",
+        max_redirects: int = 5,
+        accept_encoding: str = "gzip, deflate",
+        dns_cache: DnsCache | None = None,
+    ):
+        self.user_agent = user_agent
+        self.max_redirects = max_redirects
+        self.accept_encoding = accept_encoding
+        self.dns_cache = dns_cache
+        self._ssl = ssl.create_default_context()
+
+    async def _connect(self, host: str, port: int, https: bool) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        addrs = [host]
+        cache = self.dns_cache
+        if cache is not None:
+            addrs = cache.lookup(host, port) or await asyncio.get_running_loop().run_in_executor(
+                None, cache.resolve, host, port
+            )
+        tls = self._ssl if https else None
+        err: OSError | None = None
+        for addr in addrs:
+            try:
+                return await asyncio.open_connection(
+                    addr, port, ssl=tls, server_hostname=host if tls is not None else None, limit=1024 * 1024
+                )
+            except OSError as e:
+                err = e
+        raise err or OSError(f"{host} için adres bulunamadı")
+
+    async def _request_once(self, method: str, url: str, headers: dict[str, str], timeout: float) -> AioResponse:
+        u = urlsplit(url)
+        https = u.scheme == "https"
+        host = u.hostname or ""
+        port = u.port or (443 if https else 80)
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        reader, writer = await asyncio.wait_for(self._connect(host, port, https), timeout)
+        host_hdr = host if u.port is None else f"{host}:{u.port}"
+        req = {
+            "Host": host_hdr,
+            "User-Agent": self.user_agent,
+            "Accept": "*/*",
+            "Accept-Encoding": self.accept_encoding,
+            "Connection": "close",
+            **headers,
+        }
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in req.items()) + "\r\n"
+        try:
+            writer.write(head.encode("latin-1"))
+            await asyncio.wait_for(writer.drain(), timeout)
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            parts = status_line.decode("latin-1").split(" ", 2)
+            if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+                raise IOError(f"Geçersiz HTTP yanıtı: {url}")
+            status = int(parts[1])
+            resp_headers = Headers()
+            while True:
+                ln = await asyncio.wait_for(reader.readline(), timeout)
+                if ln in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = ln.decode("latin-1").partition(":")
+                resp_headers[k.strip().lower()] = v.strip()
+        except BaseException:
+            writer.close()
+            raise
+        return AioResponse(url=url, status=status, headers=resp_headers, reader=reader, writer=writer)
+
+    async def request(self, method: str, url: str, headers: dict[str, str] | None = None, timeout: float = 15) -> AioResponse:
+        cur = url
+        for _ in range(self.max_redirects + 1):
+            resp = await self._request_once(method, cur, headers or {}, timeout)
+            loc = resp.headers.get("location")
+            if resp.status in _REDIRECTS and loc:
+                resp.close()
+                cur = urljoin(cur, loc)
+                if resp.status == 303:
+                    method = "GET"
+                continue
+            return resp
+        raise IOError(f"Çok fazla yönlendirme: {url}")
+
+    async def probe(self, url: str, timeout_s: float) -> ProbeResult:
+        started = time.monotonic()
+        try:
+            resp = await self.request("HEAD", url, {"Accept-Encoding": "identity"}, timeout_s)
+            resp.close()
+            if resp.status in (200, 206, 302, 301):
+                return ProbeResult(ok=True, status_code=resp.status, latency_s=time.monotonic() - started)
+        except Exception:  # noqa: BLE001
+            pass
+
+        try:
+            resp = await self.request("GET", url, {"Range": "bytes=0-2047", "Accept-Encoding": "identity"}, timeout_s)
+            resp.close()
+            return ProbeResult(ok=resp.status in (200, 206), status_code=resp.status, latency_s=time.monotonic() - started)
+        except Exception:  # noqa: BLE001
+            return ProbeResult(ok=False, status_code=None, latency_s=time.monotonic() - started)
+
+    async def probe_many(
+        self,
+        urls: list[str],
+        timeout_s: float,
+        concurrency: int = 200,
+        stop_after_ok: int | None = None,
+        deadline_s: float | None = None,
+        on_result: Callable[[int, ProbeResult], None] | None = None,
+        cancel: threading.Event | None = None,
+        per_host: int | None = None,
+    ) -> list[ProbeResult | None]:
+        results: list[ProbeResult | None] = [None] * len(urls)
+        if not urls:
+            return results
+        sem = asyncio.Semaphore(max(1, concurrency))
+        host_sems: dict[str, asyncio.Semaphore] = {}
+        stop = asyncio.Event()
+        ok_count = 0
+        finished = 0
+
+        async def _probe(i: int) -> ProbeResult | None:
+            async with sem:
+                if stop.is_set():
+                    return None
+                return await self.probe(urls[i], timeout_s)
+
+        async def _limited(i: int) -> ProbeResult | None:
+            if not per_host:
+                return await _probe(i)
+            host = host_of(urls[i])
+            hs = host_sems.get(host)
+            if hs is None:
+                hs = host_sems[host] = asyncio.Semaphore(max(1, per_host))
+            async with hs:
+                return await _probe(i)
+
+        async def _one(i: int) -> None:
+            nonlocal finished
+            try:
+                _record(i, await _limited(i))
+            finally:
+                finished += 1
+                if finished == len(urls):
+                    stop.set()
+
+        def _record(i: int, pr: ProbeResult | None) -> None:
+            nonlocal ok_count
+            if pr is None:
+                return
+            results[i] = pr
+            if pr.ok:
+                ok_count += 1
+                if stop_after_ok and ok_count >= stop_after_ok:
+                    stop.set()
+            if on_result:
+                on_result(i, pr)
+
+        tasks = [asyncio.ensure_future(_one(i)) for i in range(len(urls))]
+        deadline = time.monotonic() + deadline_s if deadline_s else None
+        try:
+            while not stop.is_set():
+                if cancel is not None and cancel.is_set():
+                    break
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if cancel is not None:
+                    timeout = 0.25 if timeout is None else min(timeout, 0.25)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout)
+                except asyncio.TimeoutError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+        return results
+
+
+class AsyncioBackend:
+    def __init__(
+        self,
+        user_agent: str = "AliBaba/1.0",
+        accept_encoding: str = "gzip, deflate",
+        concurrency: int = 200,
+        dns_cache: DnsCache | None = None,
+    ):
+        self.client = AsyncHTTPClient(user_agent=user_agent, accept_encoding=accept_encoding, dns_cache=dns_cache)
+        self.concurrency = concurrency
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="alibaba-aio", daemon=True)
+        self._thread.start()
+
+    def _run(self, coro, timeout: float | None = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def probe(self, url: str, timeout_s: float) -> ProbeResult:
+        return self._run(self.client.probe(url, timeout_s))
+
+    def probe_many(
+        self,
+        urls: list[str],
+        timeout_s: float,
+        stop_after_ok: int | None = None,
+        deadline_s: float | None = None,
+        on_result: Callable[[int, ProbeResult], None] | None = None,
+        cancel: threading.Event | None = None,
+        concurrency: int | None = None,
+        per_host: int | None = None,
+    ) -> list[ProbeResult | None]:
+        return self._run(
+            self.client.probe_many(
+                urls,
+                timeout_s,
+                concurrency=concurrency or self.concurrency,
+                stop_after_ok=stop_after_ok,
+                deadline_s=deadline_s,
+                on_result=on_result,
+                cancel=cancel,
+                per_host=per_host,
+            )
+        )
+
+    def open_lines(self, url: str, headers: dict[str, str] | None = None, timeout_s: float = 15) -> AioLineStream:
+        return AioLineStream(self, url, headers or {}, timeout_s)
+
+    async def _shutdown(self) -> None:
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        if not self._loop.is_running():
+            return
+        try:
+            self._run(self._shutdown(), timeout=5)
+        except Exception:  # noqa: BLE001
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class AioLineStream:
+    def __init__(self, backend: AsyncioBackend, url: str, headers: dict[str, str], timeout_s: float):
+        self._backend = backend
+        self._timeout = timeout_s
+        self._resp: AioResponse = backend._run(backend.client.request("GET", url, headers, timeout_s))
+        self._queue: queue.Queue = queue.Queue(maxsize=16)
+        self._closed = False
+        self.status_code = self._resp.status
+        self.headers = self._resp.headers
+
+    @property
+    def bytes_read(self) -> int:
+        return self._resp.bytes_read
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code, self._resp.url)
+
+    async def _put(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    async def _pump(self) -> None:
+        batch: list[str] = []
+        try:
+            async for ln in self._resp.iter_lines(self._timeout):
+                batch.append(ln)
+                if len(batch) >= 2048:
+                    await self._put(batch)
+                    batch = []
+                    if self._closed:
+                        return
+            if batch:
+                await self._put(batch)
+            await self._put(_DONE)
+        except BaseException as e:  # noqa: BLE001
+            await self._put(e)
+        finally:
+            self._resp.close()
+
+    def iter_lines(self) -> Iterator[str]:
+        asyncio.run_coroutine_threadsafe(self._pump(), self._backend._loop)
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+
+    def close(self) -> None:
+        self._closed = True
+        self._resp.close()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> AioLineStream:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from alibaba.models import Playlist
+
+
+@dataclass(frozen=True)
+class CacheRecord:
+    key: str
+    url: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+    last_access: float
+    size: int
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    path: str
+    count: int
+    total_bytes: int
+
+
+def normalize_url(url: str) -> str:
+    try:
+        u = urlsplit((url or "").strip())
+    except Exception:  # noqa: BLE001
+        return (url or "").strip()
+    scheme = (u.scheme or "http").lower()
+    host = (u.hostname or "").lower()
+    port = u.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    if u.username or u.password:
+        host = f"{u.username or ''}:{u.password or ''}@{host}"
+    query = urlencode(sorted(parse_qsl(u.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, u.path or "/", query, ""))
+
+
+class PlaylistCache:
+    def __init__(self, base_dir: Path, ttl_s: float = 600, max_age_s: float = 7 * 86400, max_bytes: int = 200 * 1024 * 1024):
+        self.base_dir = Path(base_dir)
+        self.ttl_s = ttl_s
+        self.max_age_s = max_age_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key_for(self, url: str) -> str:
+        return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _dir(self) -> Path:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        return self.base_dir
+
+    def _meta_path(self, key: str) -> Path:
+        return self._dir() / f"{key}.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self._dir() / f"{key}.m3u.gz"
+
+    def _entries_path(self, key: str) -> Path:
+        return self._dir() / f"{key}.entries.json.gz"
+
+    def _read_meta(self, path: Path) -> CacheRecord | None:
+        try:
+            d = json.loads(path.read_text(encoding="utf-8"))
+            return CacheRecord(
+                key=d["key"],
+                url=d["url"],
+                etag=d.get("etag"),
+                last_modified=d.get("last_modified"),
+                fetched_at=float(d.get("fetched_at", 0)),
+                last_access=float(d.get("last_access", 0)),
+                size=int(d.get("size", 0)),
+            )
+        except Exception:  # noqa: BLE001
+            return None
+
+    def _write_meta(self, rec: CacheRecord) -> None:
+        p = self._meta_path(rec.key)
+        tmp = p.with_name(f"{p.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(rec.__dict__, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def lookup(self, url: str) -> CacheRecord | None:
+        rec = self._read_meta(self._meta_path(self.key_for(url)))
+        if rec is None:
+            return None
+        if time.time() - rec.fetched_at > self.max_age_s:
+            self._remove(rec.key)
+            return None
+        return rec
+
+    def is_fresh(self, rec: CacheRecord) -> bool:
+        return time.time() - rec.fetched_at <= self.ttl_s
+
+    def conditional_headers(self, rec: CacheRecord | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if rec is None:
+            return headers
+        if rec.etag:
+            headers["If-None-Match"] = rec.etag
+        if rec.last_modified:
+            headers["If-Modified-Since"] = rec.last_modified
+        return headers
+
+    def load_entries(self, rec: CacheRecord) -> Playlist | None:
+        try:
+            with gzip.open(self._entries_path(rec.key), "rt", encoding="utf-8") as f:
+                cols = json.load(f)
+            if "extinf_ids" not in cols:
+                raise ValueError("eski önbellek biçimi")
+            entries = Playlist.from_columns(cols)
+        except Exception:  # noqa: BLE001
+            self._remove(rec.key)
+            return None
+        self._write_meta(CacheRecord(**{**rec.__dict__, "last_access": time.time()}))
+        return entries
+
+    def revalidated(self, rec: CacheRecord, etag: str | None = None, last_modified: str | None = None) -> None:
+        now = time.time()
+        self._write_meta(
+            CacheRecord(
+                **{
+                    **rec.__dict__,
+                    "etag": etag or rec.etag,
+                    "last_modified": last_modified or rec.last_modified,
+                    "fetched_at": now,
+                    "last_access": now,
+                }
+            )
+        )
+
+    def store(self, url: str, entries: Playlist, etag: str | None, last_modified: str | None) -> None:
+        key = self.key_for(url)
+        entries_path = self._entries_path(key)
+        tmp = self._dir() / f"{key}.{uuid.uuid4().hex}.entries.tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+                json.dump(entries.to_columns(), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, entries_path)
+        except BaseException:
+            try:
+                tmp.unlink()
+            except Exception:  # noqa: BLE001
+                pass
+            raise
+        try:
+            self._body_path(key).unlink()
+        except FileNotFoundError:
+            pass
+        now = time.time()
+        self._write_meta(
+            CacheRecord(
+                key=key,
+                url=normalize_url(url),
+                etag=etag,
+                last_modified=last_modified,
+                fetched_at=now,
+                last_access=now,
+                size=entries_path.stat().st_size,
+            )
+        )
+        self.evict()
+
+    def _remove(self, key: str) -> None:
+        for p in (self._meta_path(key), self._body_path(key), self._entries_path(key)):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            except Exception:  # noqa: BLE001
+                pass
+
+    def records(self) -> list[CacheRecord]:
+        out: list[CacheRecord] = []
+        for p in self._dir().glob("*.json"):
+            rec = self._read_meta(p)
+            if rec is not None:
+                out.append(rec)
+        return out
+
+    def evict(self) -> None:
+        with self._lock:
+            now = time.time()
+            recs = []
+            for rec in self.records():
+                if now - rec.fetched_at > self.max_age_s:
+                    self._remove(rec.key)
+                else:
+                    recs.append(rec)
+            total = sum(r.size for r in recs)
+            for rec in sorted(recs, key=lambda r: r.last_access):
+                if total <= self.max_bytes:
+                    break
+                self._remove(rec.key)
+                total -= rec.size
+
+    def stats(self) -> CacheStats:
+        recs = self.records()
+        return CacheStats(path=str(self.base_dir), count=len(recs), total_bytes=sum(r.size for r in recs))
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in self._dir().iterdir():
+                try:
+                    p.unlink()
+                except Exception:  # noqa: BLE001
+                    pass
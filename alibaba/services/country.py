@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable
+
+_BRACKET_RE = re.compile(r"[\[\(]\s*([^\W\d_]{2,3})\s*[\]\)]")
+_TOKEN_STRIP = ":.[]()"
+
+DEFAULT_ALIASES: dict[str, str] = {
+    "TURKEY": "TR",
+    "TURKIYE": "TR",
+    "TÜRKIYE": "TR",
+    "TÜRKİYE": "TR",
+    "GERMANY": "DE",
+    "DEUTSCHLAND": "DE",
+    "ALMANYA": "DE",
+    "ROMANIA": "RO",
+    "FRANCE": "FR",
+    "ITALY": "IT",
+    "ITALIA": "IT",
+    "SPAIN": "ES",
+    "ESPANA": "ES",
+    "NETHERLANDS": "NL",
+    "HOLLAND": "NL",
+    "NEDERLAND": "NL",
+    "POLAND": "PL",
+    "POLSKA": "PL",
+    "ALBANIA": "AL",
+    "SHQIPERIA": "AL",
+    "ENGLAND": "UK",
+    "BRITAIN": "UK",
+    "ARABIC": "AR",
+}
+
+DEFAULT_IGNORE = frozenset(
+    {"HD", "FHD", "UHD", "SD", "HQ", "LQ", "4K", "8K", "HEVC", "VIP", "VOD", "PPV", "EPG", "RAW", "NEW", "ALL", "MIX", "TV"}
+)
+
+
+@dataclass(frozen=True)
+class CountryRules:
+    separators: tuple[str, ...] = ("|", "-", "_", "/", " ")
+    min_len: int = 2
+    max_len: int = 3
+    brackets: bool = True
+    aliases: dict[str, str] = field(default_factory=lambda: dict(DEFAULT_ALIASES))
+    ignore: frozenset[str] = DEFAULT_IGNORE
+
+
+class CountryClassifier:
+    def __init__(self, rules: CountryRules | None = None, max_size: int = 65536):
+        self.rules = rules or CountryRules()
+        self.max_size = max_size
+        self._aliases = {k.upper(): v.upper() for k, v in self.rules.aliases.items()}
+        self._ignore = {c.upper() for c in self.rules.ignore}
+        self._memo: dict[str, str | None] = {}
+        self._lock = threading.Lock()
+
+    def _code(self, token: str) -> str | None:
+        token = token.strip().strip(_TOKEN_STRIP).strip().upper()
+        code = self._aliases.get(token)
+        if code is None and self.rules.min_len <= len(token) <= self.rules.max_len and token.isalpha():
+            code = token
+        if code is None or code in self._ignore:
+            return None
+        return code
+
+    def _classify(self, group_title: str) -> str | None:
+        g = group_title.strip()
+        if not g:
+            return None
+        for sep in self.rules.separators:
+            if sep in g:
+                token = g.split(sep, 1)[0]
+                break
+        else:
+            token = g
+        code = self._code(token)
+        if code is None and self.rules.brackets:
+            for m in _BRACKET_RE.finditer(g):
+                code = self._code(m.group(1))
+                if code is not None:
+                    break
+        return code
+
+    def classify(self, group_title: str | None) -> str | None:
+        if not group_title:
+            return None
+        memo = self._memo
+        if group_title in memo:
+            return memo[group_title]
+        code = self._classify(group_title)
+        with self._lock:
+            if len(memo) >= self.max_size:
+                memo.clear()
+            memo[group_title] = code
+        return code
+
+    def classify_many(self, groups: Iterable[str]) -> dict[str, str | None]:
+        memo = self._memo
+        out: dict[str, str | None] = {}
+        fresh: dict[str, str | None] = {}
+        for g in groups:
+            if not g or g in out:
+                continue
+            code = memo.get(g, memo)
+            if code is memo:
+                code = fresh[g] = self._classify(g)
+            out[g] = code
+        if fresh:
+            with self._lock:
+                if len(memo) + len(fresh) > self.max_size:
+                    memo.clear()
+                memo.update(fresh)
+        return out
+
+    def group_codes(self, groups: Iterable[str]) -> dict[str, list[str]]:
+        codes: dict[str, list[str]] = {}
+        for g, code in self.classify_many(groups).items():
+            if code:
+                codes.setdefault(code, []).append(g)
+        return codes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+
+_default = CountryClassifier()
+
+
+def default_classifier() -> CountryClassifier:
+    return _default
+
+
+def set_default_classifier(classifier: CountryClassifier) -> None:
+    global _default
+    _default = classifier
+
+
+def guess_country_code(group_title: str) -> str | None:
+    return _default.classify(group_title)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from alibaba.models import Playlist
+from alibaba.services.probe_cache import ProbeCache, host_of
+
+DEDUP_KEYS = ("path", "tvg_id", "name")
+DEFAULT_DEDUP_KEYS = ("path", "name")
+
+_NORM_RE = re.compile(r"[\W_]+")
+
+
+@dataclass
+class DedupReport:
+    total: int = 0
+    kept: int = 0
+    per_source: list[int] = field(default_factory=list)
+
+    @property
+    def collapsed(self) -> int:
+        return self.total - self.kept
+
+    def summary(self) -> str:
+        return f"Tekrar: {self.collapsed} kanal birleştirildi ({self.kept}/{self.total} kaldı)"
+
+
+def _norm(text: str | None) -> str:
+    return _NORM_RE.sub("", text.casefold()) if text else ""
+
+
+def _path_prefixes(pl: Playlist) -> dict[int, str]:
+    values = pl.strings.values
+    out: dict[int, str] = {}
+    for pid in set(pl.url_prefix_ids):
+        try:
+            out[pid] = urlsplit(values[pid]).path
+        except ValueError:
+            out[pid] = values[pid]
+    return out
+
+
+def _source_score(pl: Playlist, probe_cache: ProbeCache | None) -> tuple[int, float, float]:
+    if probe_cache is None or not pl:
+        return (1, 0.0, 0.0)
+    prefix_id, _ = Counter(pl.url_prefix_ids).most_common(1)[0]
+    h = probe_cache.host_health(host_of(pl.strings.values[prefix_id]))
+    if h is None:
+        return (1, 0.0, 0.0)
+    return (0 if h.success_rate >= 0.5 else 2, -h.success_rate, h.latency_ms)
+
+
+def _key_columns(pl: Playlist, keys: tuple[str, ...]) -> list[Iterator[int | None]]:
+    cols: list[Iterator[int | None]] = []
+    if "path" in keys:
+        paths = _path_prefixes(pl)
+        cols.append(hash((0, paths[p] + u.split("?", 1)[0])) for p, u in zip(pl.url_prefix_ids, pl.url_suffixes))
+    if "tvg_id" in keys:
+        cols.append(hash((1, t.casefold())) if t else None for t in pl.tvg_ids)
+    if "name" in keys:
+        groups = [_norm(g) for g in pl.groups.values]
+        cols.append(hash((2, _norm(n), groups[g] if g >= 0 else "")) for n, g in zip(pl.names, pl.group_ids))
+    return cols
+
+
+def rank_sources(playlists: list[Playlist], probe_cache: ProbeCache | None = None) -> list[int]:
+    scores = [_source_score(pl, probe_cache) for pl in playlists]
+    return sorted(range(len(playlists)), key=scores.__getitem__)
+
+
+def dedup_playlists(
+    playlists: list[Playlist],
+    keys: tuple[str, ...] = DEFAULT_DEDUP_KEYS,
+    probe_cache: ProbeCache | None = None,
+) -> tuple[list[Playlist], DedupReport]:
+    unknown = set(keys) - set(DEDUP_KEYS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen anahtar: {', '.join(sorted(unknown))}")
+
+    seen: set[int | None] = set()
+    kept: list[array] = [array("I") for _ in playlists]
+    report = DedupReport(per_source=[0] * len(playlists))
+
+    for s in rank_sources(playlists, probe_cache):
+        pl = playlists[s]
+        out = kept[s]
+        dropped = 0
+        added: set[int | None] = set()
+        for i, hashes in enumerate(zip(*_key_columns(pl, keys))):
+            if not seen.isdisjoint(hashes):
+                dropped += 1
+                continue
+            added.update(hashes)
+            out.append(i)
+        added.discard(None)
+        seen |= added
+        report.per_source[s] = dropped
+        report.total += len(pl)
+        report.kept += len(out)
+
+    return [pl.take(k) for pl, k in zip(playlists, kept)], report
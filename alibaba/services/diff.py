@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+import uuid
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from alibaba.models import Playlist
+from alibaba.services.cache import normalize_url
+from alibaba.services.index import build_index, ensure_index
+from alibaba.services.liveness import LivenessReport, drop_dead, scan_liveness
+
+if TYPE_CHECKING:
+    from alibaba.services.iptv import IPTVService
+
+DELTA_MAX_AGE_S = 24 * 3600
+
+
+@dataclass(frozen=True)
+class GroupChange:
+    group: str
+    old_count: int
+    new_count: int
+
+
+@dataclass
+class PlaylistDiff:
+    added: array = field(default_factory=lambda: array("I"))
+    removed: array = field(default_factory=lambda: array("I"))
+    changed: list[tuple[int, int]] = field(default_factory=list)
+    unchanged: int = 0
+    added_groups: list[str] = field(default_factory=list)
+    removed_groups: list[str] = field(default_factory=list)
+    changed_groups: list[GroupChange] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.added_groups or self.removed_groups)
+
+    @property
+    def churn(self) -> float:
+        base = self.unchanged + len(self.changed) + len(self.removed)
+        return (len(self.added) + len(self.removed) + len(self.changed)) / max(1, base)
+
+    def summary(self) -> str:
+        return (
+            f"Kanal +{len(self.added)} / -{len(self.removed)} / ~{len(self.changed)}, "
+            f"grup +{len(self.added_groups)} / -{len(self.removed_groups)}"
+        )
+
+
+def _keyed(pl: Playlist, groups: set[str] | None) -> Iterator[tuple[int, tuple[str, int], int]]:
+    rows = enumerate(pl.iter_url_signatures())
+    if groups is not None:
+        mask = bytearray(len(pl))
+        for i in ensure_index(pl).select(groups):
+            mask[i] = 1
+        rows = ((i, row) for i, row in rows if mask[i])
+    seen: dict[str, int] = {}
+    for i, (url, sig) in rows:
+        n = seen.get(url, 0)
+        seen[url] = n + 1
+        yield i, (url, n), sig
+
+
+def diff_playlists(old: Playlist, new: Playlist, groups: set[str] | None = None) -> PlaylistDiff:
+    by_key = {key: (i, sig) for i, key, sig in _keyed(old, groups)}
+
+    d = PlaylistDiff()
+    for j, key, sig in _keyed(new, groups):
+        hit = by_key.pop(key, None)
+        if hit is None:
+            d.added.append(j)
+        elif hit[1] == sig:
+            d.unchanged += 1
+        else:
+            d.changed.append((hit[0], j))
+    d.removed.extend(sorted(i for i, _ in by_key.values()))
+
+    old_idx, new_idx = ensure_index(old), ensure_index(new)
+    old_groups = set(old_idx.groups) if groups is None else set(old_idx.groups) & groups
+    new_groups = set(new_idx.groups) if groups is None else set(new_idx.groups) & groups
+    d.added_groups = sorted(new_groups - old_groups, key=str.casefold)
+    d.removed_groups = sorted(old_groups - new_groups, key=str.casefold)
+    for g in sorted(old_groups & new_groups, key=str.casefold):
+        a, b = old_idx.count(g), new_idx.count(g)
+        if a != b:
+            d.changed_groups.append(GroupChange(g, a, b))
+    return d
+
+
+def apply_delta(
+    previous: Playlist, new: Playlist, diff: PlaylistDiff, groups: set[str] | None = None
+) -> tuple[Playlist, list[int]]:
+    kept = {key for _, key, _ in _keyed(previous, groups)}
+    fresh_rows = set(diff.added)
+    fresh_rows.update(j for _, j in diff.changed)
+    keep: list[int] = []
+    fresh: list[int] = []
+    for j, key, _ in _keyed(new, groups):
+        if j in fresh_rows:
+            fresh.append(len(keep))
+        elif key not in kept:
+            continue
+        keep.append(j)
+    out = new.take(keep)
+    out.index = build_index(out)
+    return out, fresh
+
+
+def scan_changes(
+    iptv: IPTVService,
+    store: SnapshotStore,
+    source_url: str,
+    groups: set[str],
+    current: Playlist,
+    playlist: Playlist,
+    diff: PlaylistDiff | None,
+    base_id: str | None,
+    snapshot_id: str | None,
+    **scan_kw: Any,
+) -> tuple[Playlist, LivenessReport]:
+    base = store.load_output(source_url, groups, base_id) if diff is not None else None
+    rows = None
+    scanned_at = time.time()
+    if base is not None:
+        previous, scanned_at = base
+        playlist, rows = apply_delta(previous, current, diff, groups)
+    report = scan_liveness(iptv, playlist, rows=rows, **scan_kw)
+    out = drop_dead(playlist, report)
+    if snapshot_id is not None:
+        store.save_output(source_url, groups, snapshot_id, out, scanned_at)
+    return out, report
+
+
+class SnapshotStore:
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+
+    def _key(self, source_url: str, groups: set[str] | None = None) -> str:
+        raw = normalize_url(source_url)
+        if groups is not None:
+            raw += "\n" + "\n".join(sorted(g.strip() for g in groups))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, source_url: str) -> Path:
+        return self.base_dir / f"{self._key(source_url)}.snapshot.json.gz"
+
+    def _output_path(self, source_url: str, groups: set[str]) -> Path:
+        return self.base_dir / f"{self._key(source_url, groups)}.output.json.gz"
+
+    def _read(self, p: Path) -> dict[str, Any] | None:
+        if not p.exists():
+            return None
+        try:
+            with gzip.open(p, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:  # noqa: BLE001
+            return None
+
+    def _write(self, p: Path, payload: dict[str, Any]) -> None:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, p)
+        except BaseException:
+            try:
+                tmp.unlink()
+            except Exception:  # noqa: BLE001
+                pass
+            raise
+
+    def load_versioned(self, source_url: str) -> tuple[Playlist, str | None] | None:
+        d = self._read(self._path(source_url))
+        if d is None:
+            return None
+        try:
+            if "columns" in d:
+                return Playlist.from_columns(d["columns"]), d.get("id")
+            return Playlist.from_columns(d), None
+        except Exception:  # noqa: BLE001
+            return None
+
+    def load(self, source_url: str) -> Playlist | None:
+        hit = self.load_versioned(source_url)
+        return hit[0] if hit is not None else None
+
+    def save(self, source_url: str, playlist: Playlist) -> str:
+        snapshot_id = uuid.uuid4().hex
+        self._write(self._path(source_url), {"id": snapshot_id, "columns": playlist.to_columns()})
+        return snapshot_id
+
+    def load_output(
+        self, source_url: str, groups: set[str], base_id: str | None, max_age_s: float = DELTA_MAX_AGE_S
+    ) -> tuple[Playlist, float] | None:
+        if not base_id:
+            return None
+        d = self._read(self._output_path(source_url, groups))
+        if d is None or d.get("base") != base_id:
+            return None
+        scanned_at = float(d.get("scanned_at") or 0)
+        if time.time() - scanned_at > max_age_s:
+            return None
+        try:
+            return Playlist.from_columns(d["columns"]), scanned_at
+        except Exception:  # noqa: BLE001
+            return None
+
+    def save_output(
+        self, source_url: str, groups: set[str], base_id: str, playlist: Playlist, scanned_at: float
+    ) -> None:
+        payload = {"base": base_id, "scanned_at": scanned_at, "columns": playlist.to_columns()}
+        self._write(self._output_path(source_url, groups), payload)
+
+    def update(self, source_url: str, playlist: Playlist) -> PlaylistDiff | None:
+        old = self.load(source_url)
+        diff = diff_playlists(old, playlist) if old is not None else None
+        self.save(source_url, playlist)
+        return diff
+
+    def clear(self) -> None:
+        for p in self.base_dir.glob("*.json.gz"):
+            try:
+                p.unlink()
+            except Exception:  # noqa: BLE001
+                pass
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+_URL_RE = re.compile(r"\w+://[^\s\"',]*")
+
+
+class DuplicateContent(Exception):
+    def __init__(self, original_url: str):
+        super().__init__(f"Aynı içerik: {original_url}")
+        self.original_url = original_url
+
+
+def _normalized(line: str) -> str:
+    if line.startswith("#"):
+        return _URL_RE.sub("", line)
+    path = line.split("?", 1)[0]
+    return path[path.rfind("/") + 1 :]
+
+
+def fingerprint_lines(
+    lines: Iterable[str],
+    on_fingerprint: Callable[[str], None],
+    limit_bytes: int = 256 * 1024,
+) -> Iterator[str]:
+    h = hashlib.blake2b(digest_size=16)
+    seen = 0
+    it = iter(lines)
+    for ln in it:
+        s = ln.strip("\ufeff").strip()
+        if s:
+            h.update(_normalized(s).encode("utf-8", "replace"))
+            h.update(b"\n")
+            seen += len(s) + 1
+        yield ln
+        if seen >= limit_bytes:
+            break
+    if seen:
+        on_fingerprint(h.hexdigest())
+    yield from it
+
+
+class FingerprintRegistry:
+    def __init__(self, limit_bytes: int = 256 * 1024):
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self._owners: dict[str, str] = {}
+        self._results: dict[str, Any] = {}
+        self._events: dict[str, threading.Event] = {}
+
+    def _event(self, url: str) -> threading.Event:
+        ev = self._events.get(url)
+        if ev is None:
+            ev = self._events[url] = threading.Event()
+        return ev
+
+    def claim(self, url: str, fingerprint: str) -> None:
+        with self._lock:
+            owner = self._owners.setdefault(fingerprint, url)
+        if owner != url:
+            raise DuplicateContent(owner)
+
+    def watch(self, url: str, lines: Iterable[str]) -> Iterator[str]:
+        return fingerprint_lines(lines, lambda fp: self.claim(url, fp), self.limit_bytes)
+
+    def publish(self, url: str, result: Any) -> None:
+        with self._lock:
+            self._results[url] = result
+            ev = self._event(url)
+        ev.set()
+
+    def wait(self, url: str, timeout: float | None = None) -> Any | None:
+        with self._lock:
+            ev = self._event(url)
+        if not ev.wait(timeout):
+            return None
+        return self._results.get(url)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Iterable
+
+from alibaba.models import Playlist
+from alibaba.services.country import CountryClassifier, default_classifier
+
+
+class PlaylistIndex:
+    __slots__ = ("groups", "_offsets", "_codes")
+
+    def __init__(self, offsets: dict[str, array], codes: dict[str, list[str]]):
+        self._offsets = offsets
+        self._codes = codes
+        self.groups: list[str] = sorted(offsets, key=lambda s: s.lower())
+
+    def count(self, group: str) -> int:
+        return len(self._offsets.get(group.strip(), ()))
+
+    def offsets(self, group: str) -> array:
+        return self._offsets.get(group.strip(), array("I"))
+
+    def country_codes(self) -> list[str]:
+        return sorted(self._codes)
+
+    def code_count(self, code: str) -> int:
+        return sum(len(self._offsets[g]) for g in self._codes.get(code.upper(), ()))
+
+    def groups_for_codes(self, codes: Iterable[str]) -> list[str]:
+        out: list[str] = []
+        for c in {c.upper() for c in codes}:
+            out.extend(self._codes.get(c, ()))
+        return out
+
+    def select(self, groups: Iterable[str]) -> list[int]:
+        parts = [self._offsets[g] for g in {g.strip() for g in groups if g} if g in self._offsets]
+        if len(parts) == 1:
+            return list(parts[0])
+        return list(heapq.merge(*parts))
+
+
+def build_index(pl: Playlist, classifier: CountryClassifier | None = None) -> PlaylistIndex:
+    by_gid: dict[int, array] = {}
+    for i, gid in enumerate(pl.group_ids):
+        if gid < 0:
+            continue
+        offs = by_gid.get(gid)
+        if offs is None:
+            offs = by_gid[gid] = array("I")
+        offs.append(i)
+
+    offsets: dict[str, array] = {}
+    for gid, offs in by_gid.items():
+        name = pl.groups.values[gid].strip()
+        if not name:
+            continue
+        prev = offsets.get(name)
+        offsets[name] = offs if prev is None else array("I", heapq.merge(prev, offs))
+
+    codes = (classifier or default_classifier()).group_codes(offsets)
+    return PlaylistIndex(offsets, codes)
+
+
+def ensure_index(pl: Playlist) -> PlaylistIndex:
+    if pl.index is None:
+        pl.index = build_index(pl)
+    return pl.index
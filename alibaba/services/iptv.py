@@ -1,36 +1,183 @@
 from __future__ import annotations
 
+import queue
 import random
+import threading
 import time
-from dataclasses import dataclass
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Callable
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator
 from urllib.parse import parse_qs, urlparse
 
 import requests
 from dateutil import parser as dtparser
 
-from alibaba.models import ChannelEntry, PlaylistAnalysis
-from alibaba.services.m3u import parse_m3u_plus, unique_groups, build_m3u_plus
+from alibaba.models import AnalysisMetrics, Playlist, PlaylistAnalysis, ProbeResult
+from alibaba.services.aio import AsyncioBackend
+from alibaba.services.cache import PlaylistCache
+from alibaba.services.metrics import MetricsLog, metrics_enabled, timed_lines
+from alibaba.services.probe_cache import ProbeCache, host_of
+from alibaba.services.transport import TransportConfig, build_session, dns_cache_for
+from alibaba.services.m3u import (
+    build_m3u_plus,
+    filter_by_groups,
+    iter_m3u_plus_chunks,
+    parse_m3u_plus_lines,
+    unique_groups,
+)
+from alibaba.services.validator import PlaylistValidator, ValidationResult
+from alibaba.services.xtream import XtreamAccount, XtreamClient, parse_account
+from alibaba.utils.threading import cancellable, check_cancelled
 
 
-@dataclass(frozen=True)
-class ProbeResult:
-    ok: bool
-    status_code: int | None
+class IPTVService:
+    def __init__(
+        self,
+        cache: PlaylistCache | None = None,
+        probe_cache: ProbeCache | None = None,
+        transport: TransportConfig | None = None,
+        backend: str = "requests",
+        collect_metrics: bool | None = None,
+        metrics_log: MetricsLog | None = None,
+    ):
+        if backend not in ("requests", "asyncio"):
+            raise ValueError(f"Bilinmeyen backend: {backend}")
+        self.cache = cache
+        self.probe_cache = probe_cache
+        self.transport = transport or TransportConfig()
+        self.backend = backend
+        self.metrics_log = metrics_log
+        self.collect_metrics = metrics_enabled() if collect_metrics is None else collect_metrics
+        self.dns_cache = dns_cache_for(self.transport)
+        self.session = build_session(self.transport, dns_cache=self.dns_cache)
+        self.probe_session = build_session(self.transport, probe=True, dns_cache=self.dns_cache)
+        self.aio: AsyncioBackend | None = None
+        if backend == "asyncio":
+            self.aio = AsyncioBackend(
+                user_agent=self.transport.user_agent,
+                accept_encoding=self.transport.accept_encoding,
+                concurrency=self.transport.async_concurrency,
+                dns_cache=self.dns_cache,
+            )
 
+    def close(self) -> None:
+        self.session.close()
+        self.probe_session.close()
+        if self.aio is not None:
+            self.aio.close()
 
-class IPTVService:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": "AliBaba/1.0"})
+    @contextmanager
+    def _stream(self, url: str, timeout_s: int, headers: dict[str, str] | None = None):
+        if self.aio is not None:
+            with self.aio.open_lines(url, headers=headers, timeout_s=timeout_s) as r:
+                yield r, r.iter_lines()
+            return
+        with self.session.get(url, timeout=timeout_s, allow_redirects=True, stream=True, headers=headers) as r:
+            yield r, self._response_lines(r)
 
     def fetch_text(self, url: str, timeout_s: int = 15) -> str:
+        if self.aio is not None:
+            return "\n".join(self.iter_lines(url, timeout_s=timeout_s))
         r = self.session.get(url, timeout=timeout_s, allow_redirects=True)
         r.raise_for_status()
         r.encoding = r.encoding or "utf-8"
         return r.text
 
+    def iter_lines(self, url: str, timeout_s: int = 15) -> Iterator[str]:
+        with self._stream(url, timeout_s) as (r, lines):
+            r.raise_for_status()
+            yield from lines
+
+    def _response_lines(self, r: requests.Response) -> Iterator[str]:
+        r.encoding = r.encoding or "utf-8"
+        yield from r.iter_lines(chunk_size=64 * 1024, decode_unicode=True)
+
+    def _body_lines(
+        self,
+        lines: Iterator[str],
+        cancel: threading.Event | None,
+        metrics: AnalysisMetrics | None,
+        watch_lines: Callable[[Iterable[str]], Iterator[str]] | None = None,
+    ) -> Iterator[str]:
+        if metrics is not None:
+            metrics.playlist_cache = "miss" if self.cache is not None else "off"
+            lines = timed_lines(lines, metrics)
+        if watch_lines is not None:
+            lines = watch_lines(lines)
+        return cancellable(lines, cancel)
+
+    def _record_bytes(self, r: Any, metrics: AnalysisMetrics | None) -> None:
+        if metrics is None:
+            return
+        n = getattr(r, "bytes_read", None)
+        if n is None:
+            try:
+                n = r.raw.tell()
+            except Exception:  # noqa: BLE001
+                n = 0
+        metrics.download_bytes += int(n or 0)
+
+    def fetch_entries(
+        self,
+        url: str,
+        timeout_s: int = 15,
+        cancel: threading.Event | None = None,
+        metrics: AnalysisMetrics | None = None,
+        watch_lines: Callable[[Iterable[str]], Iterator[str]] | None = None,
+    ) -> Playlist:
+        started = time.perf_counter()
+        entries = self._fetch_entries(url, timeout_s, cancel, metrics, watch_lines)
+        if metrics is not None:
+            elapsed = time.perf_counter() - started
+            metrics.entries = len(entries)
+            metrics.parse_s = max(0.0, elapsed - metrics.download_s)
+            metrics.entries_per_s = len(entries) / elapsed if elapsed > 0 else 0.0
+        return entries
+
+    def _fetch_entries(
+        self,
+        url: str,
+        timeout_s: int,
+        cancel: threading.Event | None,
+        metrics: AnalysisMetrics | None,
+        watch_lines: Callable[[Iterable[str]], Iterator[str]] | None = None,
+    ) -> Playlist:
+        cache = self.cache
+        if cache is None:
+            with self._stream(url, timeout_s) as (r, lines):
+                r.raise_for_status()
+                entries = parse_m3u_plus_lines(self._body_lines(lines, cancel, metrics, watch_lines))
+                self._record_bytes(r, metrics)
+            return entries
+
+        rec = cache.lookup(url)
+        if rec is not None and cache.is_fresh(rec):
+            cached = cache.load_entries(rec)
+            if cached is not None:
+                if metrics is not None:
+                    metrics.playlist_cache = "hit"
+                return cached
+            rec = None
+
+        headers = cache.conditional_headers(rec)
+        with self._stream(url, timeout_s, headers=headers) as (r, lines):
+            if r.status_code == 304 and rec is not None:
+                cached = cache.load_entries(rec)
+                if cached is not None:
+                    cache.revalidated(rec, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+                    if metrics is not None:
+                        metrics.playlist_cache = "revalidated"
+                    return cached
+                return self._fetch_entries(url, timeout_s, cancel, metrics, watch_lines)
+            r.raise_for_status()
+
+            entries = parse_m3u_plus_lines(self._body_lines(lines, cancel, metrics, watch_lines))
+            cache.store(url, entries, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+            self._record_bytes(r, metrics)
+        return entries
+
     def guess_expiry(self, url: str) -> datetime | None:
         try:
             u = urlparse(url)
@@ -70,60 +217,262 @@ class IPTVService:
         except Exception:  # noqa: BLE001
             return None
 
-    def probe_stream(self, url: str, timeout_s: int = 8) -> ProbeResult:
+    def probe_stream(self, url: str, timeout_s: int = 8, skip_dead_hosts: bool = True) -> ProbeResult:
+        pc = self.probe_cache
+        if pc is not None:
+            cached = pc.get(url)
+            if cached is not None:
+                return cached
+            if skip_dead_hosts and pc.is_host_dead(url):
+                return ProbeResult(ok=False, status_code=None, from_cache=True)
+
+        started = time.monotonic()
+        pr = self._probe_network(url, timeout_s)
+        pr = ProbeResult(ok=pr.ok, status_code=pr.status_code, latency_s=time.monotonic() - started)
+        if pc is not None:
+            pc.record(url, pr)
+        return pr
+
+    def _probe_network(self, url: str, timeout_s: int) -> ProbeResult:
+        if self.aio is not None:
+            return self.aio.probe(url, timeout_s)
         try:
-            h = self.session.head(url, timeout=timeout_s, allow_redirects=True)
+            h = self.probe_session.head(url, timeout=timeout_s, allow_redirects=True)
             if h.status_code in (200, 206, 302, 301):
                 return ProbeResult(ok=True, status_code=h.status_code)
         except Exception:  # noqa: BLE001
             pass
 
         try:
-            r = self.session.get(url, timeout=timeout_s, stream=True, headers={"Range": "bytes=0-2047"}, allow_redirects=True)
-            ok = r.status_code in (200, 206)
-            return ProbeResult(ok=ok, status_code=r.status_code)
+            with self.probe_session.get(
+                url, timeout=timeout_s, stream=True, headers={"Range": "bytes=0-2047"}, allow_redirects=True
+            ) as r:
+                ok = r.status_code in (200, 206)
+                return ProbeResult(ok=ok, status_code=r.status_code)
         except Exception:  # noqa: BLE001
             return ProbeResult(ok=False, status_code=None)
 
+    def probe_streams(
+        self,
+        urls: list[str],
+        timeout_s: int = 8,
+        stop_after_ok: int | None = 1,
+        deadline_s: float | None = None,
+        on_result: Callable[[int, ProbeResult], None] | None = None,
+        cancel: threading.Event | None = None,
+        concurrency: int | None = None,
+        per_host: int | None = None,
+        skip_dead_hosts: bool = True,
+    ) -> list[ProbeResult | None]:
+        results: list[ProbeResult | None] = [None] * len(urls)
+        if not urls:
+            return results
+
+        order = self.probe_cache.rank(urls) if self.probe_cache is not None else range(len(urls))
+        if self.aio is not None:
+            return self._probe_streams_async(
+                urls,
+                list(order),
+                timeout_s,
+                stop_after_ok,
+                deadline_s,
+                on_result,
+                cancel,
+                concurrency,
+                per_host,
+                skip_dead_hosts,
+            )
+
+        host_sems: dict[str, threading.Semaphore] = {}
+        host_lock = threading.Lock()
+
+        def _limited(url: str, timeout_s: int) -> ProbeResult:
+            host = host_of(url)
+            with host_lock:
+                sem = host_sems.get(host)
+                if sem is None:
+                    sem = host_sems[host] = threading.Semaphore(per_host)
+            with sem:
+                return self.probe_stream(url, timeout_s, skip_dead_hosts)
+
+        probe = _limited if per_host else partial(self.probe_stream, skip_dead_hosts=skip_dead_hosts)
+
+        todo: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for i in order:
+            todo.put(i)
+        done_q: queue.SimpleQueue[tuple[int, ProbeResult]] = queue.SimpleQueue()
+        stop = threading.Event()
+
+        def _worker() -> None:
+            while not stop.is_set():
+                try:
+                    i = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    pr = probe(urls[i], timeout_s)
+                except Exception:  # noqa: BLE001
+                    pr = ProbeResult(ok=False, status_code=None)
+                done_q.put((i, pr))
+
+        deadline = time.monotonic() + deadline_s if deadline_s else None
+        ok_count = 0
+        workers = min(concurrency or 16, len(urls))
+        ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alibaba-probe")
+        try:
+            for _ in range(workers):
+                ex.submit(_worker)
+            remaining = len(urls)
+            while remaining:
+                if cancel is not None and cancel.is_set():
+                    break
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if timeout == 0.0:
+                    break
+                if cancel is not None:
+                    timeout = 0.25 if timeout is None else min(timeout, 0.25)
+                try:
+                    i, pr = done_q.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                remaining -= 1
+                results[i] = pr
+                if pr.ok:
+                    ok_count += 1
+                if on_result:
+                    on_result(i, pr)
+                if stop_after_ok and ok_count >= stop_after_ok:
+                    break
+        finally:
+            stop.set()
+            ex.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def _probe_streams_async(
+        self,
+        urls: list[str],
+        order: list[int],
+        timeout_s: int,
+        stop_after_ok: int | None,
+        deadline_s: float | None,
+        on_result: Callable[[int, ProbeResult], None] | None,
+        cancel: threading.Event | None = None,
+        concurrency: int | None = None,
+        per_host: int | None = None,
+        skip_dead_hosts: bool = True,
+    ) -> list[ProbeResult | None]:
+        results: list[ProbeResult | None] = [None] * len(urls)
+        pc = self.probe_cache
+        ok_count = 0
+        todo: list[int] = []
+        for i in order:
+            cached = None
+            if pc is not None:
+                cached = pc.get(urls[i])
+                if cached is None and skip_dead_hosts and pc.is_host_dead(urls[i]):
+                    cached = ProbeResult(ok=False, status_code=None, from_cache=True)
+            if cached is None:
+                todo.append(i)
+                continue
+            results[i] = cached
+            ok_count += cached.ok
+            if on_result:
+                on_result(i, cached)
+        if not todo or (stop_after_ok and ok_count >= stop_after_ok):
+            return results
+
+        def _on_net(j: int, pr: ProbeResult) -> None:
+            i = todo[j]
+            results[i] = pr
+            if pc is not None:
+                pc.record(urls[i], pr)
+            if on_result:
+                on_result(i, pr)
+
+        self.aio.probe_many(
+            [urls[i] for i in todo],
+            timeout_s,
+            stop_after_ok=stop_after_ok - ok_count if stop_after_ok else None,
+            deadline_s=deadline_s,
+            on_result=_on_net,
+            cancel=cancel,
+            concurrency=concurrency,
+            per_host=per_host,
+        )
+        return results
+
     def analyze_playlist(
         self,
         url: str,
         on_progress: Callable[[float, str], None] | None = None,
         test_channels: int = 3,
-    ) -> tuple[PlaylistAnalysis, list[ChannelEntry]]:
-        start = time.time()
+        probe_timeout_s: int = 8,
+        probe_deadline_s: float | None = 10.0,
+        cancel: threading.Event | None = None,
+        xtream: bool = False,
+        watch_lines: Callable[[Iterable[str]], Iterator[str]] | None = None,
+    ) -> tuple[PlaylistAnalysis, Playlist]:
+        args = (url, on_progress, test_channels, probe_timeout_s, probe_deadline_s, cancel, xtream, watch_lines)
+        if not self.collect_metrics and self.metrics_log is None:
+            return self._analyze(*args, None)
+
+        m = AnalysisMetrics(source_url=url, backend=self.backend, started_at=time.time())
+        started = time.perf_counter()
+        try:
+            return self._analyze(*args, m)
+        except Exception as e:  # noqa: BLE001
+            m.error = str(e) or type(e).__name__
+            raise
+        finally:
+            m.total_s = time.perf_counter() - started
+            if self.metrics_log is not None:
+                self.metrics_log.write(m)
+
+    def _analyze(
+        self,
+        url: str,
+        on_progress: Callable[[float, str], None] | None,
+        test_channels: int,
+        probe_timeout_s: int,
+        probe_deadline_s: float | None,
+        cancel: threading.Event | None,
+        xtream: bool,
+        watch_lines: Callable[[Iterable[str]], Iterator[str]] | None,
+        metrics: AnalysisMetrics | None,
+    ) -> tuple[PlaylistAnalysis, Playlist]:
+        check_cancelled(cancel)
+        account = parse_account(url) if xtream else None
+        if account is not None:
+            try:
+                return self._analyze_xtream(
+                    url, account, on_progress, test_channels, probe_timeout_s, probe_deadline_s, cancel, metrics
+                )
+            except OSError:
+                check_cancelled(cancel)
+                if metrics is not None:
+                    metrics.source = "m3u"
+
         if on_progress:
             on_progress(0.05, "Liste indiriliyor")
 
-        text = self.fetch_text(url)
+        entries = self.fetch_entries(url, cancel=cancel, metrics=metrics, watch_lines=watch_lines)
         expiry = self.guess_expiry(url)
 
         if on_progress:
-            on_progress(0.35, "Liste ayrıştırılıyor")
+            on_progress(0.45, "Liste ayrıştırıldı")
 
-        entries = parse_m3u_plus(text)
         groups = unique_groups(entries)
         parsed_ok = len(entries) > 0
 
+        check_cancelled(cancel)
         if on_progress:
             on_progress(0.55, "Kanal örnekleri test ediliyor")
 
         fetched_ok = True
         if parsed_ok and entries:
-            sample = entries[:]
-            random.shuffle(sample)
-            sample = sample[: max(1, min(test_channels, len(sample)))]
-            ok_count = 0
-            for idx, e in enumerate(sample, start=1):
-                pr = self.probe_stream(e.url)
-                if pr.ok:
-                    ok_count += 1
-                if on_progress:
-                    on_progress(0.55 + (0.35 * (idx / len(sample))), f"Kanal testi {idx}/{len(sample)}")
-            fetched_ok = ok_count >= 1
-
-        if on_progress:
-            on_progress(0.95, "Tamamlandı")
+            picks = random.sample(range(len(entries)), max(1, min(test_channels, len(entries))))
+            sample = [entries.url_of(i) for i in picks]
+            fetched_ok = self._probe_sample(sample, on_progress, probe_timeout_s, probe_deadline_s, cancel, metrics)
 
         analysis = PlaylistAnalysis(
             source_url=url,
@@ -132,19 +481,133 @@ class IPTVService:
             channel_count=len(entries),
             groups=groups,
             expiry=expiry,
+            metrics=metrics,
+        )
+        self._finish_analysis(on_progress)
+        return analysis, entries
+
+    def _analyze_xtream(
+        self,
+        url: str,
+        account: XtreamAccount,
+        on_progress: Callable[[float, str], None] | None,
+        test_channels: int,
+        probe_timeout_s: int,
+        probe_deadline_s: float | None,
+        cancel: threading.Event | None,
+        metrics: AnalysisMetrics | None,
+    ) -> tuple[PlaylistAnalysis, Playlist]:
+        if metrics is not None:
+            metrics.source = "xtream"
+        if on_progress:
+            on_progress(0.05, "Hesap bilgisi alınıyor")
+        client = XtreamClient(self, account, metrics=metrics)
+        source = client.source()
+        groups = source.groups
+
+        check_cancelled(cancel)
+        if on_progress:
+            on_progress(0.45, "Kategoriler alındı")
+
+        fetched_ok = source.active
+        if fetched_ok and groups:
+            sample = client.sample_urls(source, test_channels, random)
+            check_cancelled(cancel)
+            if on_progress:
+                on_progress(0.55, "Kanal örnekleri test ediliyor")
+            fetched_ok = bool(sample) and self._probe_sample(
+                sample, on_progress, probe_timeout_s, probe_deadline_s, cancel, metrics
+            )
+
+        analysis = PlaylistAnalysis(
+            source_url=url,
+            fetched_ok=fetched_ok,
+            parsed_ok=bool(groups),
+            channel_count=0,
+            groups=groups,
+            expiry=source.expiry or self.guess_expiry(url),
+            metrics=metrics,
+            xtream=source,
+        )
+        self._finish_analysis(on_progress)
+        return analysis, Playlist()
+
+    def _probe_sample(
+        self,
+        sample: list[str],
+        on_progress: Callable[[float, str], None] | None,
+        probe_timeout_s: int,
+        probe_deadline_s: float | None,
+        cancel: threading.Event | None,
+        metrics: AnalysisMetrics | None,
+    ) -> bool:
+        done = 0
+
+        def _on_probe(_: int, pr: ProbeResult) -> None:
+            nonlocal done
+            done += 1
+            if metrics is not None:
+                metrics.record_probe(pr)
+            if on_progress:
+                on_progress(0.55 + (0.35 * (done / len(sample))), f"Kanal testi {done}/{len(sample)}")
+
+        probes = self.probe_streams(
+            sample,
+            timeout_s=probe_timeout_s,
+            stop_after_ok=1,
+            deadline_s=probe_deadline_s,
+            on_result=_on_probe,
+            cancel=cancel,
         )
+        check_cancelled(cancel)
+        return any(pr is not None and pr.ok for pr in probes)
 
-        _ = time.time() - start
+    def _finish_analysis(self, on_progress: Callable[[float, str], None] | None) -> None:
+        if on_progress:
+            on_progress(0.95, "Tamamlandı")
+        if self.probe_cache is not None:
+            self.probe_cache.save()
         if on_progress:
             on_progress(1.0, "Hazır")
 
-        return analysis, entries
+    def load_groups(
+        self,
+        analysis: PlaylistAnalysis | None,
+        entries: Playlist,
+        groups: set[str],
+        cancel: threading.Event | None = None,
+    ) -> Playlist:
+        source = analysis.xtream if analysis is not None else None
+        if source is None:
+            return filter_by_groups(entries, groups)
+        if source.needs_playlist(groups):
+            return filter_by_groups(self.fetch_entries(source.account.playlist_url(), cancel=cancel), groups)
+        return XtreamClient(self, source.account).load_groups(source, groups, cancel=cancel)
 
-    def filter_entries_by_groups(self, entries: list[ChannelEntry], groups: set[str]) -> list[ChannelEntry]:
-        if not groups:
-            return []
-        norm = {g.strip() for g in groups if g and g.strip()}
-        return [e for e in entries if e.group and e.group.strip() in norm]
+    def analyze_many(
+        self,
+        urls: list[str],
+        on_progress: Callable[[float, str], None] | None = None,
+        cancel: threading.Event | None = None,
+        max_workers: int = 8,
+        per_host: int = 2,
+        timeout_budget_s: float | None = None,
+        fingerprint_kb: int | None = 256,
+    ) -> list[ValidationResult]:
+        validator = PlaylistValidator(
+            self,
+            max_workers=max_workers,
+            per_host=per_host,
+            timeout_budget_s=timeout_budget_s,
+            fingerprint_kb=fingerprint_kb,
+        )
+        return validator.run(urls, on_progress=on_progress, cancel=cancel)
 
-    def to_m3u_plus(self, entries: list[ChannelEntry]) -> str:
+    def filter_entries_by_groups(self, entries: Playlist, groups: set[str]) -> Playlist:
+        return filter_by_groups(entries, groups)
+
+    def to_m3u_plus(self, entries: Iterable[Any]) -> str:
         return build_m3u_plus(entries)
+
+    def m3u_plus_chunks(self, entries: Iterable[Any]) -> Iterator[str]:
+        return iter_m3u_plus_chunks(entries)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+from alibaba.models import Playlist, ProbeResult
+from alibaba.services.index import build_index, ensure_index
+from alibaba.utils.threading import check_cancelled
+
+if TYPE_CHECKING:
+    from alibaba.services.iptv import IPTVService
+
+UNKNOWN = 0
+ALIVE = 1
+DEAD = 2
+
+DEAD_PREFIX = "[ÖLÜ] "
+
+
+@dataclass(frozen=True)
+class GroupHealth:
+    group: str
+    total: int
+    alive: int
+    dead: int
+
+    @property
+    def ratio(self) -> float | None:
+        tested = self.alive + self.dead
+        return self.alive / tested if tested else None
+
+
+@dataclass
+class LivenessReport:
+    status: bytearray = field(default_factory=bytearray)
+    groups: list[GroupHealth] = field(default_factory=list)
+    probed: int = 0
+    reused: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def alive(self) -> int:
+        return self.status.count(ALIVE)
+
+    @property
+    def dead(self) -> int:
+        return self.status.count(DEAD)
+
+    @property
+    def unknown(self) -> int:
+        return self.status.count(UNKNOWN)
+
+    @property
+    def complete(self) -> bool:
+        return UNKNOWN not in self.status
+
+    def summary(self) -> str:
+        out = f"Canlı {self.alive} / ölü {self.dead}"
+        if self.unknown:
+            out += f" / test edilemeyen {self.unknown}"
+        if self.reused:
+            out += f" / önceki taramadan {self.reused}"
+        return out + f" ({self.elapsed_s:.0f} sn)"
+
+    def weakest(self, limit: int = 5) -> list[GroupHealth]:
+        tested = [g for g in self.groups if g.ratio is not None and g.ratio < 1.0]
+        return sorted(tested, key=lambda g: (g.ratio, -g.total))[:limit]
+
+    def group_lines(self) -> list[str]:
+        lines: list[str] = []
+        for g in self.groups:
+            ratio = "-" if g.ratio is None else f"%{g.ratio * 100:.0f}"
+            lines.append(f"{g.group}\t{g.alive}/{g.total}\t{ratio}")
+        return lines
+
+
+def scan_liveness(
+    iptv: IPTVService,
+    playlist: Playlist,
+    timeout_s: int = 5,
+    deadline_s: float | None = 300.0,
+    concurrency: int = 64,
+    per_host: int | None = 16,
+    on_progress: Callable[[float, str], None] | None = None,
+    cancel: threading.Event | None = None,
+    rows: list[int] | None = None,
+) -> LivenessReport:
+    started = time.monotonic()
+    slots: dict[str, int] = {}
+    urls: list[str] = []
+    row_slot = array("I")
+    for i in range(len(playlist)) if rows is None else rows:
+        url = playlist.url_of(i)
+        j = slots.get(url)
+        if j is None:
+            j = slots[url] = len(urls)
+            urls.append(url)
+        row_slot.append(j)
+
+    done = 0
+
+    def _on_result(_: int, pr: ProbeResult) -> None:
+        nonlocal done
+        done += 1
+        if on_progress:
+            on_progress(done / len(urls), f"Canlılık testi {done}/{len(urls)}")
+
+    probes = iptv.probe_streams(
+        urls,
+        timeout_s=timeout_s,
+        stop_after_ok=None,
+        deadline_s=deadline_s,
+        on_result=_on_result,
+        cancel=cancel,
+        concurrency=concurrency,
+        per_host=per_host,
+        skip_dead_hosts=False,
+    )
+    check_cancelled(cancel)
+    if iptv.probe_cache is not None:
+        iptv.probe_cache.save()
+
+    by_url = bytes(UNKNOWN if pr is None else ALIVE if pr.ok else DEAD for pr in probes)
+    if rows is None:
+        status = bytearray(by_url[j] for j in row_slot)
+    else:
+        status = bytearray([ALIVE]) * len(playlist)
+        for i, j in zip(rows, row_slot):
+            status[i] = by_url[j]
+    idx = ensure_index(playlist)
+    groups: list[GroupHealth] = []
+    for g in idx.groups:
+        offs = idx.offsets(g)
+        alive = sum(1 for i in offs if status[i] == ALIVE)
+        dead = sum(1 for i in offs if status[i] == DEAD)
+        groups.append(GroupHealth(g, len(offs), alive, dead))
+    return LivenessReport(
+        status=status,
+        groups=groups,
+        probed=len(urls),
+        reused=0 if rows is None else len(playlist) - len(rows),
+        elapsed_s=time.monotonic() - started,
+    )
+
+
+def drop_dead(playlist: Playlist, report: LivenessReport, keep_unknown: bool = True) -> Playlist:
+    status = report.status
+    keep = [i for i in range(len(playlist)) if status[i] == ALIVE or (keep_unknown and status[i] == UNKNOWN)]
+    out = playlist.take(keep)
+    out.index = build_index(out)
+    return out
+
+
+def mark_dead(playlist: Playlist, report: LivenessReport) -> Playlist:
+    status = report.status
+    out = Playlist()
+    out.header = playlist.header
+    for row in playlist:
+        name = row.name
+        if status[row.index] == DEAD:
+            name = DEAD_PREFIX + name
+        out.append(name, row.url, row.group, row.tvg_id, row.tvg_name, row.tvg_logo, row.extinf, row.extras)
+    out.compact()
+    out.index = build_index(out)
+    return out
+
+
+def apply_liveness(playlist: Playlist, report: LivenessReport, mode: str = "drop") -> Playlist:
+    if mode == "mark":
+        return mark_dead(playlist, report)
+    if mode != "drop":
+        raise ValueError(f"Bilinmeyen mod: {mode}")
+    return drop_dead(playlist, report)
@@ -1,22 +1,26 @@
 from __future__ import annotations
 
 import re
+from typing import Any, Iterable, Iterator, TextIO
 
-from alibaba.models import ChannelEntry
+from alibaba.models import ChannelEntry, ChannelRow, Playlist
+from alibaba.services.index import build_index, ensure_index
 
 
 _EXTINF_RE = re.compile(r"^#EXTINF:(?P<dur>-?\d+)\s*(?P<attrs>[^,]*),(?P<name>.*)$")
 _ATTR_RE = re.compile(r"(\w[\w-]*)=\"([^\"]*)\"")
 
 
-def parse_m3u_plus(text: str) -> list[ChannelEntry]:
-    lines = [ln.strip("\ufeff").rstrip() for ln in text.splitlines()]
-    entries: list[ChannelEntry] = []
-
+def _iter_records(
+    lines: Iterable[str], meta: dict[str, str] | None = None
+) -> Iterator[tuple[str, str, str | None, str | None, str | None, str | None, str | None, str]]:
     pending: dict[str, str] | None = None
     pending_name: str | None = None
+    head: str | None = None
+    extras = ""
 
-    for ln in lines:
+    for raw in lines:
+        ln = raw.strip("\ufeff").rstrip()
         if not ln:
             continue
 
@@ -24,64 +28,132 @@ def parse_m3u_plus(text: str) -> list[ChannelEntry]:
             m = _EXTINF_RE.match(ln)
             pending = {}
             pending_name = ""
+            head = None
+            extras = ""
             if m:
                 attrs = m.group("attrs") or ""
-                pending_name = (m.group("name") or "").strip()
+                name = m.group("name") or ""
+                pending_name = name.strip()
+                head = ln[: len(ln) - len(name.lstrip())]
                 for k, v in _ATTR_RE.findall(attrs):
                     pending[k] = v
             continue
 
         if ln.startswith("#"):
+            if pending is not None:
+                extras += ln + "\n"
+            elif meta is not None and ln.startswith("#EXTM3U"):
+                meta.setdefault("header", ln)
             continue
 
         if pending is None:
             continue
 
         url = ln
-        group = pending.get("group-title")
-        tvg_id = pending.get("tvg-id")
         tvg_name = pending.get("tvg-name")
-        tvg_logo = pending.get("tvg-logo")
-
-        entries.append(
-            ChannelEntry(
-                name=pending_name or tvg_name or url,
-                url=url,
-                group=group,
-                tvg_id=tvg_id,
-                tvg_name=tvg_name,
-                tvg_logo=tvg_logo,
-            )
+        yield (
+            pending_name or tvg_name or url,
+            url,
+            pending.get("group-title"),
+            pending.get("tvg-id"),
+            tvg_name,
+            pending.get("tvg-logo"),
+            head,
+            extras,
         )
         pending = None
         pending_name = None
 
-    return entries
+
+def iter_m3u_plus(lines: Iterable[str]) -> Iterator[ChannelEntry]:
+    for rec in _iter_records(lines):
+        yield ChannelEntry(*rec)
+
+
+def parse_m3u_plus_lines(lines: Iterable[str]) -> Playlist:
+    pl = Playlist()
+    meta: dict[str, str] = {}
+    append = pl.append
+    for rec in _iter_records(lines, meta):
+        append(*rec)
+    pl.header = meta.get("header")
+    pl.compact()
+    pl.index = build_index(pl)
+    return pl
+
+
+def parse_m3u_plus(text: str) -> Playlist:
+    return parse_m3u_plus_lines(text.splitlines())
 
 
-def unique_groups(entries: list[ChannelEntry]) -> list[str]:
+def unique_groups(entries: Iterable[Any]) -> list[str]:
+    if isinstance(entries, Playlist):
+        return list(ensure_index(entries).groups)
     groups = {e.group.strip() for e in entries if e.group and e.group.strip()}
     return sorted(groups, key=lambda s: s.lower())
 
 
-def build_m3u_plus(entries: list[ChannelEntry]) -> str:
-    out: list[str] = ["#EXTM3U"]
-    for e in entries:
-        attrs: list[str] = []
-        if e.tvg_id:
-            attrs.append(f'tvg-id="{e.tvg_id}"')
-        if e.tvg_name:
-            attrs.append(f'tvg-name="{e.tvg_name}"')
-        if e.tvg_logo:
-            attrs.append(f'tvg-logo="{e.tvg_logo}"')
-        if e.group:
-            attrs.append(f'group-title="{e.group}"')
-
-        attr_str = " ".join(attrs)
-        if attr_str:
-            out.append(f"#EXTINF:-1 {attr_str},{e.name}")
+def filter_by_groups(entries: Playlist, groups: set[str]) -> Playlist:
+    return entries.take(ensure_index(entries).select(groups))
+
+
+def filter_by_country_codes(entries: Playlist, codes: set[str]) -> Playlist:
+    idx = ensure_index(entries)
+    return entries.take(idx.select(idx.groups_for_codes(codes)))
+
+
+def iter_by_country_codes(entries: Playlist, codes: set[str]) -> Iterator[ChannelRow]:
+    idx = ensure_index(entries)
+    return entries.rows(idx.select(idx.groups_for_codes(codes)))
+
+
+def _format_entry(e: Any) -> str:
+    head = getattr(e, "extinf", None)
+    if head:
+        return f"{head}{e.name}\n{e.extras}{e.url}\n"
+
+    attrs: list[str] = []
+    if e.tvg_id:
+        attrs.append(f'tvg-id="{e.tvg_id}"')
+    if e.tvg_name:
+        attrs.append(f'tvg-name="{e.tvg_name}"')
+    if e.tvg_logo:
+        attrs.append(f'tvg-logo="{e.tvg_logo}"')
+    if e.group:
+        attrs.append(f'group-title="{e.group}"')
+
+    extras = getattr(e, "extras", "")
+    attr_str = " ".join(attrs)
+    if attr_str:
+        return f"#EXTINF:-1 {attr_str},{e.name}\n{extras}{e.url}\n"
+    return f"#EXTINF:-1,{e.name}\n{extras}{e.url}\n"
+
+
+def _iter_playlist_records(pl: Playlist) -> Iterator[str]:
+    for i, (name, url, head, extras) in enumerate(pl.iter_records()):
+        if head is None:
+            yield _format_entry(ChannelRow(pl, i))
         else:
-            out.append(f"#EXTINF:-1,{e.name}")
-        out.append(e.url)
+            yield f"{head}{name}\n{extras}{url}\n"
+
+
+def iter_m3u_plus_chunks(entries: Iterable[Any], chunk_entries: int = 2048) -> Iterator[str]:
+    header = getattr(entries, "header", None) or "#EXTM3U"
+    records = _iter_playlist_records(entries) if isinstance(entries, Playlist) else map(_format_entry, entries)
+    buf: list[str] = [header + "\n"]
+    for rec in records:
+        buf.append(rec)
+        if len(buf) >= chunk_entries:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+def write_m3u_plus(entries: Iterable[Any], fp: TextIO) -> None:
+    for chunk in iter_m3u_plus_chunks(entries):
+        fp.write(chunk)
+
 
-    return "\n".join(out) + "\n"
+def build_m3u_plus(entries: Iterable[Any]) -> str:
+    return "".join(iter_m3u_plus_chunks(entries))
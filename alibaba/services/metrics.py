@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from alibaba.models import AnalysisMetrics
+
+ENV_VAR = "ALIBABA_METRICS"
+
+
+def metrics_enabled() -> bool:
+    return (os.environ.get(ENV_VAR) or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def timed_lines(lines: Iterable[str], metrics: AnalysisMetrics) -> Iterator[str]:
+    it = iter(lines)
+    clock = time.perf_counter
+    spent = 0.0
+    try:
+        while True:
+            t0 = clock()
+            try:
+                ln = next(it)
+            except StopIteration:
+                return
+            finally:
+                spent += clock() - t0
+            yield ln
+    finally:
+        metrics.download_s += spent
+
+
+class MetricsLog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, metrics: AnalysisMetrics) -> None:
+        line = json.dumps(metrics.to_dict(), ensure_ascii=False)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception:  # noqa: BLE001
+            pass
+
+    def read(self) -> list[AnalysisMetrics]:
+        out: list[AnalysisMetrics] = []
+        if not self.path.exists():
+            return out
+        for ln in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                out.append(AnalysisMetrics(**json.loads(ln)))
+            except (ValueError, TypeError):
+                continue
+        return out
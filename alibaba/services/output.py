@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Iterable, Iterator
+
+from alibaba.models import Playlist
+from alibaba.services.m3u import iter_m3u_plus_chunks
+from alibaba.services.storage import SaveResult, StorageService
+from alibaba.utils.progress import ProgressMerger
+from alibaba.utils.threading import check_cancelled
+
+_CHUNK_ENTRIES = 2048
+
+
+@dataclass(frozen=True)
+class OutputJob:
+    label: str
+    entries: Iterable[Any] | Callable[[], Iterable[Any]]
+    expiry: datetime | None = None
+
+    def rows(self) -> Iterable[Any]:
+        return self.entries() if callable(self.entries) else self.entries
+
+
+def _counted(
+    chunks: Iterable[str],
+    total: int | None,
+    report: Callable[[float], None],
+    cancel: threading.Event | None,
+) -> Iterator[str]:
+    for n, chunk in enumerate(chunks):
+        check_cancelled(cancel)
+        if total and n:
+            report(min(0.95, 0.95 * n * _CHUNK_ENTRIES / total))
+        yield chunk
+
+
+def write_outputs(
+    storage: StorageService,
+    jobs: list[OutputJob],
+    ext: str,
+    on_progress: Callable[[float, str], None] | None = None,
+    cancel: threading.Event | None = None,
+    max_workers: int = 4,
+) -> list[SaveResult]:
+    if not jobs:
+        return []
+
+    total = len(jobs)
+    merger = ProgressMerger(total)
+    tracker_report = getattr(on_progress, "report", None)
+
+    def _report(i: int, p: float, msg: str, finished: bool = False) -> None:
+        if not on_progress:
+            return
+        overall = merger.update(i, p)
+        if tracker_report is not None:
+            tracker_report(overall, f"{i + 1}/{total}: {msg}", worker=i, done=finished)
+        else:
+            on_progress(overall, f"{i + 1}/{total}: {msg}")
+
+    def _write(i: int) -> SaveResult | None:
+        job = jobs[i]
+        try:
+            check_cancelled(cancel)
+            rows = job.rows()
+            size: int | None = None
+            if isinstance(rows, Playlist):
+                if not rows:
+                    return None
+                size = len(rows)
+            else:
+                it = iter(rows)
+                first = next(it, None)
+                if first is None:
+                    return None
+                rows = chain((first,), it)
+            _report(i, 0.0, "Dosya yazılıyor")
+            chunks = iter_m3u_plus_chunks(rows, chunk_entries=_CHUNK_ENTRIES)
+            counted = _counted(chunks, size, lambda p: _report(i, p, "Dosya yazılıyor"), cancel)
+            return storage.save_chunks(counted, label=job.label, ext=ext, expiry=job.expiry)
+        finally:
+            _report(i, 1.0, "Tamamlandı", finished=True)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, total), thread_name_prefix="alibaba-output") as ex:
+        results = list(ex.map(_write, range(total)))
+    check_cancelled(cancel)
+    return [r for r in results if r is not None]
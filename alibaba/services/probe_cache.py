@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from alibaba.models import ProbeResult
+
+
+@dataclass
+class HostHealth:
+    host: str
+    probes: int = 0
+    successes: int = 0
+    success_rate: float = 0.0
+    latency_ms: float = 0.0
+    consecutive_failures: int = 0
+    last_ok: float = 0.0
+    last_fail: float = 0.0
+
+
+def host_of(url: str) -> str:
+    try:
+        u = urlsplit(url)
+        host = (u.hostname or "").lower()
+        return f"{host}:{u.port}" if u.port else host
+    except Exception:  # noqa: BLE001
+        return ""
+
+
+class ProbeCache:
+    def __init__(
+        self,
+        path: Path | None = None,
+        positive_ttl_s: float = 600,
+        negative_ttl_s: float = 120,
+        dead_after: int = 3,
+        alpha: float = 0.3,
+        max_urls: int = 5000,
+    ):
+        self.path = Path(path) if path else None
+        self.positive_ttl_s = positive_ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.dead_after = dead_after
+        self.alpha = alpha
+        self.max_urls = max_urls
+        self._lock = threading.Lock()
+        self._urls: dict[str, tuple[bool, int | None, float]] = {}
+        self._hosts: dict[str, HostHealth] = {}
+        self._dirty = False
+        self.load()
+
+    def get(self, url: str) -> ProbeResult | None:
+        with self._lock:
+            hit = self._urls.get(url)
+        if hit is None:
+            return None
+        ok, status, at = hit
+        ttl = self.positive_ttl_s if ok else self.negative_ttl_s
+        if time.time() - at > ttl:
+            return None
+        return ProbeResult(ok=ok, status_code=status, from_cache=True)
+
+    def host_health(self, host: str) -> HostHealth | None:
+        with self._lock:
+            return self._hosts.get(host)
+
+    def is_host_dead(self, url: str) -> bool:
+        h = self.host_health(host_of(url))
+        if h is None or h.consecutive_failures < self.dead_after:
+            return False
+        return time.time() - h.last_fail <= self.negative_ttl_s
+
+    def record(self, url: str, result: ProbeResult) -> None:
+        if result.from_cache:
+            return
+        now = time.time()
+        host = host_of(url)
+        with self._lock:
+            self._urls[url] = (result.ok, result.status_code, now)
+            h = self._hosts.get(host)
+            if h is None:
+                h = self._hosts[host] = HostHealth(host=host, success_rate=1.0 if result.ok else 0.0)
+            h.probes += 1
+            a = self.alpha
+            h.success_rate = (1 - a) * h.success_rate + a * (1.0 if result.ok else 0.0)
+            if result.ok:
+                h.successes += 1
+                h.consecutive_failures = 0
+                h.last_ok = now
+                if result.latency_s is not None:
+                    ms = result.latency_s * 1000
+                    h.latency_ms = ms if h.latency_ms <= 0 else (1 - a) * h.latency_ms + a * ms
+            elif result.status_code is None:
+                h.consecutive_failures += 1
+                h.last_fail = now
+            else:
+                h.consecutive_failures = 0
+            self._dirty = True
+
+    def rank(self, urls: list[str]) -> list[int]:
+        def _score(i: int) -> tuple[int, float, float]:
+            h = self.host_health(host_of(urls[i]))
+            if h is None:
+                return (1, 0.0, 0.0)
+            if h.success_rate >= 0.5:
+                return (0, -h.success_rate, h.latency_ms)
+            return (2, -h.success_rate, h.latency_ms)
+
+        return sorted(range(len(urls)), key=_score)
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            d = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:  # noqa: BLE001
+            return
+        with self._lock:
+            for url, (ok, status, at) in (d.get("urls") or {}).items():
+                self._urls[url] = (bool(ok), status, float(at))
+            for host, raw in (d.get("hosts") or {}).items():
+                try:
+                    self._hosts[host] = HostHealth(**raw)
+                except TypeError:
+                    continue
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        now = time.time()
+        keep = max(self.positive_ttl_s, self.negative_ttl_s)
+        with self._lock:
+            urls = {u: v for u, v in self._urls.items() if now - v[2] <= keep}
+            if len(urls) > self.max_urls:
+                newest = sorted(urls.items(), key=lambda kv: kv[1][2], reverse=True)[: self.max_urls]
+                urls = dict(newest)
+            self._urls = urls
+            payload = {"urls": urls, "hosts": {h: asdict(v) for h, v in self._hosts.items()}}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception:  # noqa: BLE001
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._urls.clear()
+            self._hosts.clear()
+            self._dirty = True
+        self.save()
@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable
 
-from kivy.app import App
-from kivy.utils import platform
+from alibaba.services.cache import CacheStats, PlaylistCache
+from alibaba.services.diff import SnapshotStore
+from alibaba.services.probe_cache import ProbeCache
+
+
+def _is_android() -> bool:
+    return bool(os.environ.get("ANDROID_PRIVATE") or os.environ.get("ANDROID_ARGUMENT"))
 
 
 @dataclass(frozen=True)
@@ -17,12 +24,17 @@ class SaveResult:
 
 
 class StorageService:
-    def __init__(self, app_name: str):
+    def __init__(self, app_name: str, data_dir: str | Path | None = None, output_dir: str | Path | None = None):
         self.app_name = app_name
+        self.data_dir = Path(data_dir) if data_dir else None
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._playlist_cache: PlaylistCache | None = None
+        self._probe_cache: ProbeCache | None = None
+        self._snapshots: SnapshotStore | None = None
+        self._state_lock = threading.Lock()
 
     def _state_path(self) -> Path:
-        app = App.get_running_app()
-        base = Path(getattr(app, "user_data_dir", Path.home()))
+        base = Path(self.private_dir())
         base.mkdir(parents=True, exist_ok=True)
         return base / "alibaba_state.json"
 
@@ -40,17 +52,18 @@ class StorageService:
         p.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
 
     def next_version_for_day(self, day_key: str) -> int:
-        state = self._load_state()
-        versions = state.get("versions", {})
-        cur = int(versions.get(day_key, 0))
-        cur += 1
-        versions[day_key] = cur
-        state["versions"] = versions
-        self._save_state(state)
-        return cur
+        with self._state_lock:
+            state = self._load_state()
+            versions = state.get("versions", {})
+            cur = int(versions.get(day_key, 0))
+            cur += 1
+            versions[day_key] = cur
+            state["versions"] = versions
+            self._save_state(state)
+            return cur
 
     def downloads_dir(self) -> Path:
-        if platform == "android":
+        if _is_android():
             return Path(self.private_dir())
 
         android_guess = Path("/storage/emulated/0/Download")
@@ -65,14 +78,45 @@ class StorageService:
         return home
 
     def ensure_output_dir(self) -> Path:
-        out_dir = self.downloads_dir() / "iptv dosyalari"
+        out_dir = self.output_dir or self.downloads_dir() / "iptv dosyalari"
         out_dir.mkdir(parents=True, exist_ok=True)
         return out_dir
 
     def private_dir(self) -> str:
+        if self.data_dir is not None:
+            return str(self.data_dir)
+        from kivy.app import App
+
         app = App.get_running_app()
         return str(getattr(app, "user_data_dir", Path.home()))
 
+    def cache_dir(self) -> Path:
+        return Path(self.private_dir()) / "cache"
+
+    def playlist_cache(self) -> PlaylistCache:
+        if self._playlist_cache is None:
+            self._playlist_cache = PlaylistCache(self.cache_dir() / "playlists")
+        return self._playlist_cache
+
+    def playlist_cache_stats(self) -> CacheStats:
+        return self.playlist_cache().stats()
+
+    def clear_playlist_cache(self) -> None:
+        self.playlist_cache().clear()
+
+    def probe_cache(self) -> ProbeCache:
+        if self._probe_cache is None:
+            self._probe_cache = ProbeCache(self.cache_dir() / "probe_health.json")
+        return self._probe_cache
+
+    def clear_probe_cache(self) -> None:
+        self.probe_cache().clear()
+
+    def snapshot_store(self) -> SnapshotStore:
+        if self._snapshots is None:
+            self._snapshots = SnapshotStore(self.cache_dir() / "snapshots")
+        return self._snapshots
+
     def build_filename(
         self,
         label: str,
@@ -98,21 +142,44 @@ class StorageService:
         label: str,
         ext: str,
         expiry: datetime | None,
+    ) -> SaveResult:
+        return self.save_chunks([content], label=label, ext=ext, expiry=expiry)
+
+    def save_chunks(
+        self,
+        chunks: Iterable[str],
+        label: str,
+        ext: str,
+        expiry: datetime | None,
     ) -> SaveResult:
         created = datetime.now()
         filename, version = self.build_filename(label=label, created=created, ext=ext, expiry=expiry)
 
-        if platform == "android":
+        if _is_android() and self.output_dir is None:
             private_path = Path(self.private_dir()) / filename
-            private_path.write_text(content, encoding="utf-8")
+            self._write_chunks(private_path, chunks)
             shared_uri = self._copy_to_android_downloads(private_file=str(private_path), filename=filename)
             return SaveResult(file_path=shared_uri or str(private_path), version=version)
 
         out_dir = self.ensure_output_dir()
         path = out_dir / filename
-        path.write_text(content, encoding="utf-8")
+        self._write_chunks(path, chunks)
         return SaveResult(file_path=str(path), version=version)
 
+    def _write_chunks(self, path: Path, chunks: Iterable[str]) -> None:
+        tmp = path.with_name(f".{path.name}.part")
+        try:
+            with open(tmp, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                tmp.unlink()
+            except Exception:  # noqa: BLE001
+                pass
+            raise
+
     def _copy_to_android_downloads(self, private_file: str, filename: str) -> str | None:
         try:
             from androidstorage4kivy import SharedStorage  # type: ignore
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    pool_connections: int = 32
+    pool_maxsize: int = 16
+    pool_block: bool = False
+    max_retries: int = 2
+    probe_retries: int = 0
+    backoff_factor: float = 0.3
+    backoff_jitter: float = 0.3
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+    dns_cache_ttl_s: float = 300.0
+    dns_cache_size: int = 1024
+    dns_cache_global: bool = False
+    accept_encoding: str = "gzip, deflate"
+    user_agent: str = "AliBaba/1.0"
+    async_concurrency: int = 200
+
+
+def _retry(cfg: TransportConfig, total: int) -> Retry:
+    kwargs = dict(
+        total=total,
+        connect=total,
+        read=total,
+        status=total,
+        backoff_factor=cfg.backoff_factor,
+        status_forcelist=cfg.retry_statuses,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(backoff_jitter=cfg.backoff_jitter, **kwargs)
+    except TypeError:
+        return Retry(**kwargs)
+
+
+def dns_cache_for(cfg: TransportConfig) -> DnsCache | None:
+    if cfg.dns_cache_ttl_s <= 0:
+        return None
+    if cfg.dns_cache_global:
+        install_dns_cache(cfg.dns_cache_ttl_s, cfg.dns_cache_size)
+        return None
+    return DnsCache(cfg.dns_cache_ttl_s, cfg.dns_cache_size)
+
+
+def build_session(cfg: TransportConfig, probe: bool = False, dns_cache: DnsCache | None = None) -> requests.Session:
+    s = requests.Session()
+    adapter_cls = partial(DnsCachingAdapter, dns_cache) if dns_cache is not None else HTTPAdapter
+    adapter = adapter_cls(
+        pool_connections=cfg.pool_connections,
+        pool_maxsize=cfg.pool_maxsize,
+        pool_block=cfg.pool_block,
+        max_retries=_retry(cfg, cfg.probe_retries if probe else cfg.max_retries),
+    )
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers.update(
+        {
+            "User-Agent": cfg.user_agent,
+            "Accept-Encoding": "identity" if probe else cfg.accept_encoding,
+            "Connection": "keep-alive",
+        }
+    )
+    return s
+
+
+_orig_getaddrinfo = socket.getaddrinfo
+
+
+class DnsCache:
+    def __init__(self, ttl_s: float, max_entries: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, list]] = OrderedDict()
+        self._inflight: dict[tuple, threading.Lock] = {}
+
+    def _get(self, key: tuple) -> list | None:
+        hit = self._entries.get(key)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return hit[1]
+
+    def _put(self, key: tuple, res: list) -> None:
+        now = time.monotonic()
+        entries = self._entries
+        entries[key] = (now + self.ttl_s, res)
+        entries.move_to_end(key)
+        for k in [k for k, (expires, _) in entries.items() if expires <= now]:
+            del entries[k]
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):  # noqa: A002
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            hit = self._get(key)
+            if hit is not None:
+                return list(hit)
+            lock = self._inflight.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._lock:
+                hit = self._get(key)
+                if hit is not None:
+                    return list(hit)
+            try:
+                res = _orig_getaddrinfo(host, port, family, type, proto, flags)
+            except BaseException:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                raise
+            with self._lock:
+                self._put(key, res)
+                self._inflight.pop(key, None)
+            return list(res)
+
+    def lookup(self, host: str, port: int) -> list[str] | None:
+        with self._lock:
+            hit = self._get((host, port, 0, socket.SOCK_STREAM, 0, 0))
+        return _addresses(hit) if hit else None
+
+    def resolve(self, host: str, port: int) -> list[str]:
+        return _addresses(self.getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _addresses(infos: list) -> list[str]:
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+class _CachedDnsConnection:
+    dns_cache: DnsCache
+
+    def _new_conn(self):
+        host = self._dns_host
+        err: Exception | None = None
+        try:
+            for addr in self.dns_cache.resolve(host, self.port):
+                self._dns_host = addr
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    err = e
+        finally:
+            self._dns_host = host
+        raise err or OSError(f"{host} için adres bulunamadı")
+
+
+def _cached_pool(pool_cls: type[HTTPConnectionPool], dns_cache: DnsCache) -> type[HTTPConnectionPool]:
+    base = pool_cls.ConnectionCls
+    conn_cls = type(base.__name__, (_CachedDnsConnection, base), {"dns_cache": dns_cache})
+    return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": conn_cls})
+
+
+class DnsCachingAdapter(HTTPAdapter):
+    __attrs__ = HTTPAdapter.__attrs__ + ["dns_cache"]
+
+    def __init__(self, dns_cache: DnsCache, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _cached_pool(HTTPConnectionPool, self.dns_cache),
+            "https": _cached_pool(HTTPSConnectionPool, self.dns_cache),
+        }
+
+
+_global_dns: DnsCache | None = None
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):  # noqa: A002
+    cache = _global_dns
+    if cache is None:
+        return _orig_getaddrinfo(host, port, family, type, proto, flags)
+    return cache.getaddrinfo(host, port, family, type, proto, flags)
+
+
+def install_dns_cache(ttl_s: float, max_entries: int = 1024) -> None:
+    global _global_dns
+    if ttl_s <= 0:
+        _global_dns = None
+    elif _global_dns is None or (_global_dns.ttl_s, _global_dns.max_entries) != (ttl_s, max(1, int(max_entries))):
+        _global_dns = DnsCache(ttl_s, max_entries)
+    if socket.getaddrinfo is not _cached_getaddrinfo:
+        socket.getaddrinfo = _cached_getaddrinfo
+
+
+def clear_dns_cache() -> None:
+    if _global_dns is not None:
+        _global_dns.clear()
@@ -1,17 +1,120 @@
 from __future__ import annotations
 
 import re
+from typing import IO, Iterable, Iterator
 
 
-_URL_RE = re.compile(r"https?://[^\s\]\)\}\>\"']+", re.IGNORECASE)
+_URL_RE = re.compile(r"https?://[^\s\]\)\}\>\"'<]+", re.IGNORECASE)
+_TRAILING = ".,;:!?*'\""
+_ACCOUNT_PATHS = ("/get.php", "/player_api.php")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+_PARTS_RE = re.compile(
+    r"(https?)://(?:([^@/?#]*)@)?(\[[^\]/?#]*\]|[^\[\]:/?#]*)(?::(\d+))?(/[^?#]*)?(?:\?([^#]*))?(?:#.*)?",
+    re.IGNORECASE,
+)
+_MAX_CARRY = 64 * 1024
+
+
+def _canonical(url: str) -> tuple[str, tuple[str, str, str] | None] | None:
+    url = url.strip().rstrip(_TRAILING)
+    if "&amp;" in url:
+        url = url.replace("&amp;", "&")
+    m = _PARTS_RE.fullmatch(url)
+    if m is None:
+        return None
+    scheme, auth, host, port, path, query = m.groups()
+    scheme = scheme.lower()
+    host = host.lower()
+    if not host:
+        return None
+    if port:
+        port = port.lstrip("0") or "0"
+        if port == _DEFAULT_PORTS[scheme]:
+            port = None
+    host_key = f"{host}:{port}" if port else host
+    netloc = f"{auth}@{host_key}" if auth is not None else host_key
+    path = path or "/"
+
+    if not query:
+        return f"{scheme}://{netloc}{path}", None
+    params = query.split("&")
+    low = path.lower()
+    if low.endswith(_ACCOUNT_PATHS):
+        kv: dict[str, str] = {}
+        for p in params:
+            k, _, v = p.partition("=")
+            kv.setdefault(k.lower(), v)
+        username, password = kv.get("username"), kv.get("password")
+        if username and password:
+            output = kv.get("output") if low.endswith("/get.php") else None
+            params = [f"password={password}", "type=m3u_plus", f"username={username}"]
+            if output:
+                params.insert(0, f"output={output}")
+            path = path[: path.rfind("/")] + "/get.php"
+            return f"{scheme}://{netloc}{path}?" + "&".join(params), (host_key, username, password)
+    if len(params) > 1:
+        params = sorted((p for p in params if p), key=lambda p: p.partition("=")[0])
+    query = "&".join(params)
+    return f"{scheme}://{netloc}{path}" + (f"?{query}" if query else ""), None
+
+
+def canonicalize_url(url: str) -> str | None:
+    res = _canonical(url)
+    return res[0] if res else None
+
+
+def account_key(url: str) -> tuple[str, str, str] | None:
+    res = _canonical(url)
+    return res[1] if res else None
+
+
+class UrlExtractor:
+    def __init__(self):
+        self._carry = ""
+        self._seen: set = set()
+
+    def _emit(self, text: str) -> Iterator[str]:
+        for m in _URL_RE.finditer(text):
+            res = _canonical(m.group(0))
+            if res is None:
+                continue
+            url, account = res
+            key = account or url
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            yield url
+
+    def feed(self, chunk: str) -> Iterator[str]:
+        text = self._carry + chunk
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"), text.rfind("\r"))
+        if cut < 0 and len(text) < _MAX_CARRY:
+            self._carry = text
+            return
+        if cut < 0:
+            cut = len(text) - 1
+        self._carry = text[cut + 1 :]
+        yield from self._emit(text[: cut + 1])
+
+    def close(self) -> Iterator[str]:
+        text, self._carry = self._carry, ""
+        yield from self._emit(text)
+
+
+def iter_urls(chunks: Iterable[str]) -> Iterator[str]:
+    ex = UrlExtractor()
+    for chunk in chunks:
+        yield from ex.feed(chunk)
+    yield from ex.close()
+
+
+def iter_text_chunks(fp: IO[str], size: int = 1024 * 1024) -> Iterator[str]:
+    while True:
+        chunk = fp.read(size)
+        if not chunk:
+            return
+        yield chunk
 
 
 def extract_urls(text: str) -> list[str]:
-    found = [m.group(0).strip() for m in _URL_RE.finditer(text or "")]
-    dedup: list[str] = []
-    seen = set()
-    for u in found:
-        if u not in seen:
-            seen.add(u)
-            dedup.append(u)
-    return dedup
+    return list(iter_urls([text or ""]))
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Callable
+from urllib.parse import urlparse
+
+from alibaba.models import Playlist, PlaylistAnalysis
+from alibaba.services.fingerprint import DuplicateContent, FingerprintRegistry
+from alibaba.utils.progress import ProgressMerger
+
+if TYPE_CHECKING:
+    from alibaba.services.iptv import IPTVService
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    url: str
+    analysis: PlaylistAnalysis | None
+    entries: Playlist = field(default_factory=Playlist)
+    error: str | None = None
+    duplicate_of: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        a = self.analysis
+        return bool(a and a.fetched_ok and a.parsed_ok and self.entries)
+
+
+class PlaylistValidator:
+    def __init__(
+        self,
+        iptv: IPTVService,
+        max_workers: int = 8,
+        per_host: int = 2,
+        timeout_budget_s: float | None = None,
+        fingerprint_kb: int | None = 256,
+    ):
+        self.iptv = iptv
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.timeout_budget_s = timeout_budget_s
+        self.fingerprint_kb = fingerprint_kb
+        self._host_lock = threading.Lock()
+        self._host_sems: dict[str, threading.Semaphore] = {}
+
+    def _host_sem(self, url: str) -> threading.Semaphore:
+        try:
+            host = (urlparse(url).hostname or "").lower()
+        except Exception:  # noqa: BLE001
+            host = ""
+        with self._host_lock:
+            sem = self._host_sems.get(host)
+            if sem is None:
+                sem = threading.Semaphore(self.per_host)
+                self._host_sems[host] = sem
+            return sem
+
+    def run(
+        self,
+        urls: list[str],
+        on_progress: Callable[[float, str], None] | None = None,
+        cancel: threading.Event | None = None,
+    ) -> list[ValidationResult]:
+        if not urls:
+            return []
+
+        total = len(urls)
+        stop = threading.Event()
+        deadline = time.monotonic() + self.timeout_budget_s if self.timeout_budget_s else None
+        merger = ProgressMerger(total)
+        registry = FingerprintRegistry(self.fingerprint_kb * 1024) if self.fingerprint_kb else None
+        done_count = 0
+        progress_lock = threading.Lock()
+
+        def _stopped() -> bool:
+            if stop.is_set():
+                return True
+            if cancel is not None and cancel.is_set():
+                return True
+            return deadline is not None and time.monotonic() >= deadline
+
+        tracker_report = getattr(on_progress, "report", None)
+
+        def _report(i: int, p: float, msg: str, finished: bool = False) -> None:
+            if not on_progress:
+                return
+            overall = merger.update(i, p)
+            with progress_lock:
+                done = done_count
+            if tracker_report is not None:
+                tracker_report(overall, f"{done}/{total}: {msg}", worker=i, done=finished)
+            else:
+                on_progress(overall, f"{done}/{total}: {msg}")
+
+        def _reuse(url: str, original: str) -> ValidationResult | None:
+            while True:
+                res = registry.wait(original, timeout=0.2)
+                if res is not None:
+                    if not res.ok:
+                        return None
+                    return ValidationResult(
+                        url=url, analysis=res.analysis, entries=res.entries, error=res.error, duplicate_of=original
+                    )
+                if _stopped():
+                    return ValidationResult(url=url, analysis=None, error="İptal edildi")
+
+        def _analyze(i: int, url: str, watch: bool) -> ValidationResult:
+            sem = self._host_sem(url)
+            while not sem.acquire(timeout=0.2):
+                if _stopped():
+                    return ValidationResult(url=url, analysis=None, error="İptal edildi")
+            try:
+                if _stopped():
+                    return ValidationResult(url=url, analysis=None, error="İptal edildi")
+                analysis, entries = self.iptv.analyze_playlist(
+                    url,
+                    on_progress=lambda p, msg: _report(i, p, msg),
+                    cancel=stop,
+                    watch_lines=partial(registry.watch, url) if watch and registry is not None else None,
+                )
+                return ValidationResult(url=url, analysis=analysis, entries=entries)
+            except DuplicateContent:
+                raise
+            except Exception as e:  # noqa: BLE001
+                return ValidationResult(url=url, analysis=None, error=str(e))
+            finally:
+                sem.release()
+
+        def _check(i: int, url: str) -> ValidationResult:
+            nonlocal done_count
+            try:
+                try:
+                    return _analyze(i, url, watch=True)
+                except DuplicateContent as e:
+                    _report(i, 0.9, "Aynı içerik, ilk analiz bekleniyor")
+                    res = _reuse(url, e.original_url)
+                if res is not None:
+                    return res
+                _report(i, 0.0, "İlk analiz başarısız, yeniden analiz ediliyor")
+                return _analyze(i, url, watch=False)
+            finally:
+                with progress_lock:
+                    done_count += 1
+                _report(i, 1.0, "Tamamlandı", finished=True)
+
+        def _checked(i: int, url: str) -> ValidationResult:
+            res = _check(i, url)
+            if registry is not None:
+                registry.publish(url, res)
+            return res
+
+        results: list[ValidationResult | None] = [None] * total
+        ex = ThreadPoolExecutor(max_workers=min(self.max_workers, total), thread_name_prefix="alibaba-validate")
+        try:
+            futures: dict[Future, int] = {ex.submit(_checked, i, u): i for i, u in enumerate(urls)}
+            pending = set(futures)
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    break
+                timeout = 0.5
+                if deadline is not None:
+                    timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+                finished, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    results[futures[f]] = f.result()
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        finally:
+            stop.set()
+            ex.shutdown(wait=False, cancel_futures=True)
+
+        reason = "İptal edildi" if cancel is not None and cancel.is_set() else "Süre doldu"
+        return [r or ValidationResult(url=urls[i], analysis=None, error=reason) for i, r in enumerate(results)]
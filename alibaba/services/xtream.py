@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from alibaba.models import AnalysisMetrics, Playlist
+from alibaba.services.index import build_index
+from alibaba.utils.threading import cancellable, check_cancelled
+
+if TYPE_CHECKING:
+    from alibaba.services.iptv import IPTVService
+
+_ACCOUNT_PATHS = ("/get.php", "/player_api.php")
+_INACTIVE = {"expired", "banned", "disabled"}
+_ALL_STREAMS_SHARE = 0.25
+
+
+class XtreamError(IOError):
+    pass
+
+
+@dataclass(frozen=True)
+class XtreamAccount:
+    base_url: str
+    username: str
+    password: str
+    output: str = "ts"
+
+    def api_url(self, action: str | None = None, **params: str) -> str:
+        q = {"username": self.username, "password": self.password}
+        if action:
+            q["action"] = action
+        q.update(params)
+        return f"{self.base_url}/player_api.php?{urlencode(q)}"
+
+    def stream_url(self, stream_id: Any, kind: str = "live", ext: str | None = None) -> str:
+        ext = self.output if kind == "live" else ext or "mp4"
+        return f"{self.base_url}/{kind}/{self.username}/{self.password}/{stream_id}.{ext}"
+
+    def playlist_url(self) -> str:
+        q = {"username": self.username, "password": self.password, "type": "m3u_plus", "output": self.output}
+        return f"{self.base_url}/get.php?{urlencode(q)}"
+
+
+def parse_account(url: str) -> XtreamAccount | None:
+    try:
+        u = urlsplit((url or "").strip())
+    except ValueError:
+        return None
+    path = u.path or ""
+    if u.scheme.lower() not in ("http", "https") or not u.netloc or not path.lower().endswith(_ACCOUNT_PATHS):
+        return None
+    qs: dict[str, str] = {}
+    for k, v in parse_qsl(u.query, keep_blank_values=True):
+        qs.setdefault(k.lower(), v)
+    username, password = qs.get("username"), qs.get("password")
+    if not username or not password:
+        return None
+    output = qs.get("output") if qs.get("output") in ("ts", "m3u8") else "ts"
+    return XtreamAccount(f"{u.scheme.lower()}://{u.netloc}{path[: path.rfind('/')]}", username, password, output)
+
+
+@dataclass
+class XtreamSource:
+    account: XtreamAccount
+    categories: dict[str, str] = field(default_factory=dict)
+    user_info: dict[str, Any] = field(default_factory=dict)
+    vod_categories: dict[str, str] = field(default_factory=dict)
+    series_categories: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def groups(self) -> list[str]:
+        names = set(self.categories) | set(self.vod_categories) | set(self.series_categories)
+        return sorted(names, key=lambda s: s.lower())
+
+    def needs_playlist(self, groups: Iterable[str]) -> bool:
+        return any(g and g.strip() in self.series_categories for g in groups)
+
+    @property
+    def active(self) -> bool:
+        return str(self.user_info.get("status") or "").lower() not in _INACTIVE
+
+    @property
+    def expiry(self) -> datetime | None:
+        raw = str(self.user_info.get("exp_date") or "").strip()
+        if not raw.isdigit() or int(raw) <= 0:
+            return None
+        try:
+            return datetime.fromtimestamp(int(raw))
+        except Exception:  # noqa: BLE001
+            return None
+
+
+class XtreamClient:
+    def __init__(
+        self,
+        iptv: IPTVService,
+        account: XtreamAccount,
+        timeout_s: int = 15,
+        metrics: AnalysisMetrics | None = None,
+    ):
+        self.iptv = iptv
+        self.account = account
+        self.timeout_s = timeout_s
+        self.metrics = metrics
+
+    def _get(self, action: str | None = None, **params: str) -> Any:
+        started = time.perf_counter()
+        text = self.iptv.fetch_text(self.account.api_url(action, **params), timeout_s=self.timeout_s)
+        if self.metrics is not None:
+            self.metrics.download_s += time.perf_counter() - started
+            self.metrics.download_bytes += len(text.encode("utf-8"))
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise XtreamError("player_api.php JSON döndürmedi") from e
+
+    def account_info(self) -> dict[str, Any]:
+        data = self._get()
+        info = data.get("user_info") if isinstance(data, dict) else None
+        if not isinstance(info, dict):
+            raise XtreamError("Geçersiz player_api.php yanıtı")
+        if str(info.get("auth")) != "1":
+            raise XtreamError("Xtream hesabı doğrulanamadı")
+        return info
+
+    def _categories(self, action: str) -> dict[str, str]:
+        data = self._get(action)
+        if not isinstance(data, list):
+            raise XtreamError("Geçersiz kategori listesi")
+        out: dict[str, str] = {}
+        for c in data:
+            if not isinstance(c, dict):
+                raise XtreamError("Geçersiz kategori listesi")
+            name = str(c.get("category_name") or "").strip()
+            if name and c.get("category_id") is not None:
+                out.setdefault(name, str(c["category_id"]))
+        return out
+
+    def _streams(self, action: str, category_id: str | None = None) -> list[dict[str, Any]]:
+        data = self._get(action, **({"category_id": category_id} if category_id else {}))
+        if not isinstance(data, list) or not all(isinstance(s, dict) for s in data):
+            raise XtreamError("Geçersiz kanal listesi")
+        return data
+
+    def live_categories(self) -> dict[str, str]:
+        return self._categories("get_live_categories")
+
+    def vod_categories(self) -> dict[str, str]:
+        return self._categories("get_vod_categories")
+
+    def series_categories(self) -> dict[str, str]:
+        return self._categories("get_series_categories")
+
+    def live_streams(self, category_id: str | None = None) -> list[dict[str, Any]]:
+        return self._streams("get_live_streams", category_id)
+
+    def vod_streams(self, category_id: str | None = None) -> list[dict[str, Any]]:
+        return self._streams("get_vod_streams", category_id)
+
+    def source(self) -> XtreamSource:
+        info = self.account_info()
+        return XtreamSource(
+            self.account,
+            categories=self.live_categories(),
+            user_info=info,
+            vod_categories=self.vod_categories(),
+            series_categories=self.series_categories(),
+        )
+
+    def _kinds(self, source: XtreamSource) -> list[tuple[str, dict[str, str], Callable[..., list[dict[str, Any]]]]]:
+        return [("live", source.categories, self.live_streams), ("movie", source.vod_categories, self.vod_streams)]
+
+    def sample_urls(self, source: XtreamSource, count: int, rnd: Any) -> list[str]:
+        for kind, categories, fetch in self._kinds(source):
+            ids = list(categories.values())
+            rnd.shuffle(ids)
+            for cid in ids[:3]:
+                streams = fetch(cid)
+                if streams:
+                    picks = rnd.sample(streams, max(1, min(count, len(streams))))
+                    stream_url = self.account.stream_url
+                    return [stream_url(s.get("stream_id"), kind, s.get("container_extension")) for s in picks]
+        return []
+
+    def _batches(
+        self, categories: dict[str, str], wanted: set[str], fetch: Callable[..., list[dict[str, Any]]]
+    ) -> list[list[dict[str, Any]]]:
+        if not wanted:
+            return []
+        if len(wanted) > _ALL_STREAMS_SHARE * len(categories):
+            return [fetch()]
+        ordered = [categories[g] for g in sorted(wanted, key=str.lower)]
+        with ThreadPoolExecutor(max_workers=min(8, len(ordered)), thread_name_prefix="alibaba-xtream") as ex:
+            return list(ex.map(fetch, ordered))
+
+    def load_groups(
+        self,
+        source: XtreamSource,
+        groups: Iterable[str],
+        cancel: threading.Event | None = None,
+    ) -> Playlist:
+        selected = {g.strip() for g in groups if g and g.strip()}
+        pl = Playlist()
+        append = pl.append
+        for kind, categories, fetch in self._kinds(source):
+            wanted = selected & categories.keys()
+            names = {categories[g]: g for g in wanted}
+            batches = self._batches(categories, wanted, fetch)
+            check_cancelled(cancel)
+            for streams in batches:
+                for s in cancellable(streams, cancel):
+                    group = names.get(str(s.get("category_id")))
+                    if group is None:
+                        continue
+                    name = str(s.get("name") or "").strip()
+                    url = self.account.stream_url(s.get("stream_id"), kind, s.get("container_extension"))
+                    tvg_id, logo = s.get("epg_channel_id") or None, s.get("stream_icon") or None
+                    append(name or url, url, group, tvg_id, name or None, logo)
+        pl.compact()
+        pl.index = build_index(pl)
+        return pl
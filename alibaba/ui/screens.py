@@ -1,22 +1,28 @@
 from __future__ import annotations
 
 import math
-import time
+from itertools import chain
 from dataclasses import dataclass
 from datetime import datetime
 
 from kivy.app import App
 from kivy.clock import Clock
-from kivy.metrics import dp
-from kivy.properties import NumericProperty, StringProperty
+from kivy.properties import BooleanProperty, NumericProperty, ObjectProperty, StringProperty
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.uix.screenmanager import Screen
 
-from kivymd.uix.list import IRightBodyTouch, OneLineAvatarIconListItem, MDList
-from kivymd.uix.selectioncontrol import MDCheckbox
+from kivymd.uix.boxlayout import MDBoxLayout
 
-from alibaba.models import ChannelEntry
+from alibaba.models import Playlist
+from alibaba.services.dedup import dedup_playlists
+from alibaba.services.diff import diff_playlists, scan_changes
+from alibaba.services.index import ensure_index
+from alibaba.services.liveness import LivenessReport, drop_dead, scan_liveness
+from alibaba.services.m3u import filter_by_country_codes, iter_by_country_codes
+from alibaba.services.output import OutputJob, write_outputs
+from alibaba.services.storage import SaveResult
 from alibaba.services.url_finder import extract_urls
-from alibaba.utils.threading import run_in_thread
+from alibaba.utils.progress import ProgressSnapshot, ProgressTracker
 
 
 class HomeScreen(Screen):
@@ -36,31 +42,44 @@ class ManualScreen(Screen):
 
         self.progress = 0.0
         self.eta_text = ""
-        started = time.time()
 
-        def _progress(p: float, msg: str) -> None:
-            def _ui(*_):
-                self.progress = float(max(0.0, min(1.0, p)))
-                app.root.status_text = msg
-                elapsed = time.time() - started
-                if self.progress > 0.02:
-                    remaining = max(0.0, (elapsed / self.progress) - elapsed)
-                    self.eta_text = f"~{int(remaining)} sn"
-
-            Clock.schedule_once(_ui, 0)
-
-        def _work() -> None:
-            analysis, entries = app.iptv.analyze_playlist(url, on_progress=_progress)
-
-            def _done(*_):
-                app.state.last_analysis = analysis
-                app.state.last_entries = entries
-                app.state.selection.clear()
-                app.root.current = "group_select"
-
-            Clock.schedule_once(_done, 0)
-
-        run_in_thread(_work, on_error=lambda e: app.show_error("Hata", str(e)))
+        def _ui(snap: ProgressSnapshot) -> None:
+            self.progress = snap.progress
+            app.root.status_text = snap.message
+            self.eta_text = snap.eta_text
+
+        progress = ProgressTracker(_ui)
+
+        def _work(token):
+            analysis, entries = app.iptv.analyze_playlist(url, on_progress=progress, cancel=token, xtream=True)
+            store = app.storage.snapshot_store()
+            previous, previous_id = store.load_versioned(url) or (None, None)
+            diff = snapshot_id = None
+            if analysis.xtream is None:
+                diff = diff_playlists(previous, entries) if previous is not None else None
+                snapshot_id = store.save(url, entries)
+            return analysis, entries, previous, previous_id, snapshot_id, diff
+
+        def _done(result) -> None:
+            progress.close()
+            analysis, entries, previous, previous_id, snapshot_id, diff = result
+            app.state.last_analysis = analysis
+            app.state.last_entries = entries
+            app.state.previous_entries = previous
+            app.state.previous_snapshot_id = previous_id
+            app.state.snapshot_id = snapshot_id
+            app.state.last_diff = diff
+            app.state.selection.clear()
+            app.root.current = "group_select"
+            if diff is not None:
+                app.root.status_text = f"Önceki analize göre: {diff.summary()}"
+
+        app.tasks.submit(
+            _work,
+            key="manual.analyze",
+            on_done=_done,
+            on_error=lambda e: app.show_error("Hata", str(e)),
+        )
 
 
 class AutoScreen(Screen):
@@ -88,39 +107,29 @@ class AutoScreen(Screen):
 
         self.progress = 0.0
         self.eta_text = ""
-        started = time.time()
-
-        working: list[tuple[str, list[ChannelEntry], datetime | None]] = []
-
-        def _set_progress(p: float, msg: str) -> None:
-            def _ui(*_):
-                self.progress = float(max(0.0, min(1.0, p)))
-                app.root.status_text = msg
-                elapsed = time.time() - started
-                if self.progress > 0.02:
-                    remaining = max(0.0, (elapsed / self.progress) - elapsed)
-                    self.eta_text = f"~{int(remaining)} sn"
-
-            Clock.schedule_once(_ui, 0)
 
-        def _work() -> None:
-            for i, url in enumerate(urls, start=1):
-                base = (i - 1) / len(urls)
+        def _ui(snap: ProgressSnapshot) -> None:
+            self.progress = snap.progress
+            app.root.status_text = snap.message
+            self.eta_text = snap.eta_text
 
-                def _inner_progress(p: float, msg: str) -> None:
-                    _set_progress(base + (p * (1.0 / len(urls))), f"{i}/{len(urls)}: {msg}")
+        progress = ProgressTracker(_ui)
 
-                analysis, entries = app.iptv.analyze_playlist(url, on_progress=_inner_progress)
-                if analysis.fetched_ok and analysis.parsed_ok and entries:
-                    working.append((url, entries, analysis.expiry))
+        def _work(token) -> list[tuple[str, Playlist, datetime | None]]:
+            results = app.iptv.analyze_many(urls, on_progress=progress, cancel=token, timeout_budget_s=15 * 60)
+            return [(res.url, res.entries, res.analysis.expiry) for res in results if res.ok and res.duplicate_of is None]
 
-            def _done(*_):
-                app.state.auto_working = working
-                app.root.current = "auto_country"
+        def _done(working: list[tuple[str, Playlist, datetime | None]]) -> None:
+            progress.close()
+            app.state.auto_working = working
+            app.root.current = "auto_country"
 
-            Clock.schedule_once(_done, 0)
-
-        run_in_thread(_work, on_error=lambda e: app.show_error("Hata", str(e)))
+        app.tasks.submit(
+            _work,
+            key="auto.analyze",
+            on_done=_done,
+            on_error=lambda e: app.show_error("Hata", str(e)),
+        )
 
 
 class CountrySelectScreen(Screen):
@@ -131,32 +140,27 @@ class CountrySelectScreen(Screen):
     def _render(self) -> None:
         app = App.get_running_app()
         working = list(app.state.auto_working)
-        codes = set()
+        counts: dict[str, int] = {}
         for _, entries, _ in working:
-            for e in entries:
-                if not e.group:
-                    continue
-                code = _guess_country_code(e.group)
-                if code:
-                    codes.add(code)
-
-        codes_sorted = sorted(codes)
-        container: MDList = self.ids.country_list
-        container.clear_widgets()
-
-        for c in codes_sorted:
-            item = CodeItem(text=c)
-            item.checkbox.active = c in app.state.auto_country_codes
-            item.checkbox.bind(active=lambda cb, val, code=c: _on_code_toggle(code, val))
-            container.add_widget(item)
-
+            idx = ensure_index(entries)
+            for code in idx.country_codes():
+                counts[code] = counts.get(code, 0) + idx.code_count(code)
+
+        codes_sorted = sorted(counts)
+        selected = app.state.auto_country_codes
+        self.ids.country_list.data = [
+            {"text": f"{c} ({counts[c]})", "key": c, "active": c in selected, "toggle": self._on_toggle}
+            for c in codes_sorted
+        ]
         self.ids.summary_label.text = f"Çalışan link: {len(working)} | Ülke kodu: {len(codes_sorted)}"
 
-        def _on_code_toggle(code: str, val: bool) -> None:
-            if val:
-                app.state.auto_country_codes.add(code)
-            else:
-                app.state.auto_country_codes.discard(code)
+    def _on_toggle(self, index: int, code: str, val: bool) -> None:
+        app = App.get_running_app()
+        if val:
+            app.state.auto_country_codes.add(code)
+        else:
+            app.state.auto_country_codes.discard(code)
+        _set_row_active(self.ids.country_list, index, code, val)
 
     def on_next(self) -> None:
         app = App.get_running_app()
@@ -167,43 +171,67 @@ class CountrySelectScreen(Screen):
 
 
 class GroupSelectScreen(Screen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rows: list[tuple[str, str, int | None]] = []
+        self._filter_ev = None
+
     def on_pre_enter(self, *args):
         super().on_pre_enter(*args)
-        self._render(filter_text="")
-
-    def on_filter(self) -> None:
-        self._render(filter_text=(self.ids.group_filter.text or "").strip())
-
-    def _render(self, filter_text: str) -> None:
         app = App.get_running_app()
         analysis = app.state.last_analysis
         if not analysis:
-            return
+            self._rows = []
+        else:
+            idx = ensure_index(app.state.last_entries)
+            lazy = analysis.xtream is not None
+            self._rows = [(g, g.lower(), None if lazy else idx.count(g)) for g in analysis.groups]
+        self._apply_filter(filter_text=(self.ids.group_filter.text or "").strip())
 
-        groups = list(analysis.groups)
-        if filter_text:
-            f = filter_text.lower()
-            groups = [g for g in groups if f in g.lower()]
-
-        container: MDList = self.ids.group_list
-        container.clear_widgets()
+    def on_filter(self) -> None:
+        if self._filter_ev is not None:
+            self._filter_ev.cancel()
+        filter_text = (self.ids.group_filter.text or "").strip()
+        self._filter_ev = Clock.schedule_once(lambda *_: self._apply_filter(filter_text), 0.25)
 
+    def _apply_filter(self, filter_text: str) -> None:
+        app = App.get_running_app()
+        rows = self._rows
         selected = app.state.selection.selected_groups
 
-        for g in groups:
-            item = GroupItem(text=g)
-            item.checkbox.active = g in selected
-            item.checkbox.bind(active=lambda cb, val, group=g: _on_toggle(group, val))
-            container.add_widget(item)
-
-        self.ids.summary_label.text = f"Grup: {len(analysis.groups)} | Seçili: {len(selected)}"
+        def _work(_token) -> list[dict]:
+            f = filter_text.lower()
+            return [
+                {"text": g if n is None else f"{g} ({n})", "key": g, "active": g in selected, "toggle": self._on_toggle}
+                for g, low, n in rows
+                if not f or f in low
+            ]
+
+        def _ui(data: list[dict]) -> None:
+            self.ids.group_list.data = data
+            self._update_summary()
+
+        app.tasks.submit(
+            _work,
+            key="group_select.filter",
+            on_done=_ui,
+            on_error=lambda e: app.show_error("Hata", str(e)),
+        )
+
+    def _update_summary(self) -> None:
+        app = App.get_running_app()
+        selected = app.state.selection.selected_groups
+        self.ids.summary_label.text = f"Grup: {len(self._rows)} | Seçili: {len(selected)}"
 
-        def _on_toggle(group: str, val: bool) -> None:
-            if val:
-                selected.add(group)
-            else:
-                selected.discard(group)
-            self.ids.summary_label.text = f"Grup: {len(analysis.groups)} | Seçili: {len(selected)}"
+    def _on_toggle(self, index: int, group: str, val: bool) -> None:
+        app = App.get_running_app()
+        selected = app.state.selection.selected_groups
+        if val:
+            selected.add(group)
+        else:
+            selected.discard(group)
+        _set_row_active(self.ids.group_list, index, group, val)
+        self._update_summary()
 
     def select_all(self) -> None:
         app = App.get_running_app()
@@ -211,12 +239,21 @@ class GroupSelectScreen(Screen):
         if not analysis:
             return
         app.state.selection.set_all(analysis.groups)
-        self._render(filter_text=(self.ids.group_filter.text or "").strip())
+        self._refresh_active()
 
     def clear_all(self) -> None:
         app = App.get_running_app()
         app.state.selection.clear()
-        self._render(filter_text=(self.ids.group_filter.text or "").strip())
+        self._refresh_active()
+
+    def _refresh_active(self) -> None:
+        app = App.get_running_app()
+        selected = app.state.selection.selected_groups
+        rv = self.ids.group_list
+        for d in rv.data:
+            d["active"] = d["key"] in selected
+        rv.refresh_from_data()
+        self._update_summary()
 
     def on_next(self) -> None:
         app = App.get_running_app()
@@ -227,6 +264,9 @@ class GroupSelectScreen(Screen):
 
 
 class OutputManualScreen(Screen):
+    progress = NumericProperty(0.0)
+    eta_text = StringProperty("")
+
     def save(self) -> None:
         app = App.get_running_app()
         analysis = app.state.last_analysis
@@ -236,19 +276,65 @@ class OutputManualScreen(Screen):
 
         ext = _ext_from_ui(self)
         label = (self.ids.label_input.text or "alibaba").strip() or "alibaba"
+        deep = bool(self.ids.deep_scan_switch.active)
 
         selected = set(app.state.selection.selected_groups)
-        filtered = app.iptv.filter_entries_by_groups(app.state.last_entries, selected)
-        if not filtered:
-            app.show_error("Hata", "Seçili gruplarda kanal bulunamadı.")
-            return
-
-        content = app.iptv.to_m3u_plus(filtered)
-        res = app.storage.save_text_file(content=content, label=label, ext=ext, expiry=analysis.expiry)
-        app.root.status_text = f"Kaydedildi: {res.file_path}"
+        entries = app.state.last_entries
+        previous = app.state.previous_entries
+        previous_id = app.state.previous_snapshot_id
+        snapshot_id = app.state.snapshot_id
+        scan_progress = _progress_tracker(self, app) if deep else None
+        write_progress = _progress_tracker(self, app)
+
+        def _work(token) -> tuple[list[SaveResult], list[str]]:
+            loaded = app.iptv.load_groups(analysis, entries, selected, cancel=token)
+            if not loaded:
+                raise ValueError("Seçili gruplarda kanal bulunamadı.")
+            store = app.storage.snapshot_store()
+            current, current_id = entries, snapshot_id
+            if analysis.xtream is not None:
+                current, current_id = loaded, store.save(analysis.source_url, loaded)
+
+            notes: list[str] = []
+            diff = None
+            if previous is not None:
+                diff = diff_playlists(previous, current, selected)
+                notes.append(diff.summary())
+            filtered = loaded
+            if deep:
+                filtered, report = scan_changes(
+                    app.iptv,
+                    store,
+                    analysis.source_url,
+                    selected,
+                    current,
+                    loaded,
+                    diff,
+                    previous_id,
+                    current_id,
+                    on_progress=scan_progress,
+                    cancel=token,
+                )
+                notes.append(_liveness_text(report))
+                if not filtered:
+                    raise ValueError("Canlı kanal bulunamadı.")
+
+            job = OutputJob(label=label, entries=filtered, expiry=analysis.expiry)
+            return write_outputs(app.storage, [job], ext, on_progress=write_progress, cancel=token), notes
+
+        app.root.status_text = "Çıktı hazırlanıyor"
+        app.tasks.submit(
+            _work,
+            key="output_manual.save",
+            on_done=lambda out: _show_saved(app, (scan_progress, write_progress), *out),
+            on_error=lambda e: app.show_error("Hata", str(e)),
+        )
 
 
 class OutputAutoScreen(Screen):
+    progress = NumericProperty(0.0)
+    eta_text = StringProperty("")
+
     def save(self) -> None:
         app = App.get_running_app()
         working = list(app.state.auto_working)
@@ -259,84 +345,104 @@ class OutputAutoScreen(Screen):
         ext = _ext_from_ui(self)
         label = (self.ids.label_input.text or "alibaba").strip() or "alibaba"
         combine = bool(self.ids.combine_switch.active)
+        dedup = combine and bool(self.ids.dedup_switch.active)
+        deep = bool(self.ids.deep_scan_switch.active)
         codes = set(app.state.auto_country_codes)
-
-        outputs: list[tuple[str, datetime | None]] = []
-
-        if combine:
-            merged: list[ChannelEntry] = []
-            expiries: list[datetime] = []
-            for _, entries, expiry in working:
-                merged.extend(_filter_by_country_codes(entries, codes))
-                if expiry:
-                    expiries.append(expiry)
-            expiry_min = min(expiries) if expiries else None
-            outputs.append((app.iptv.to_m3u_plus(merged), expiry_min))
-
-            res = app.storage.save_text_file(content=outputs[0][0], label=f"{label}_auto", ext=ext, expiry=outputs[0][1])
-            app.root.status_text = f"Kaydedildi: {res.file_path}"
-            return
-
-        for idx, (_, entries, expiry) in enumerate(working, start=1):
-            filtered = _filter_by_country_codes(entries, codes)
-            if not filtered:
-                continue
-            content = app.iptv.to_m3u_plus(filtered)
-            res = app.storage.save_text_file(content=content, label=f"{label}_{idx}", ext=ext, expiry=expiry)
-            app.root.status_text = f"Kaydedildi: {res.file_path}"
-
-
-class _RightCheckbox(IRightBodyTouch, MDCheckbox):
-    pass
-
-
-class GroupItem(OneLineAvatarIconListItem):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.checkbox = _RightCheckbox(size_hint=(None, None), size=(dp(48), dp(48)))
-        self.add_widget(self.checkbox)
-
-
-class CodeItem(OneLineAvatarIconListItem):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.checkbox = _RightCheckbox(size_hint=(None, None), size=(dp(48), dp(48)))
-        self.add_widget(self.checkbox)
-
-
-def _guess_country_code(group_title: str) -> str | None:
-    if not group_title:
-        return None
-    g = group_title.strip()
-    if not g:
-        return None
-
-    for sep in ["|", "-", "_", "/", " "]:
-        if sep in g:
-            token = g.split(sep, 1)[0].strip()
-            break
-    else:
-        token = g
-
-    token = token.upper()
-    if 2 <= len(token) <= 3 and token.isalpha():
-        return token
-    return None
-
-
-def _filter_by_country_codes(entries: list[ChannelEntry], codes: set[str]) -> list[ChannelEntry]:
-    if not codes:
-        return []
-
-    codes_u = {c.upper() for c in codes}
-    out: list[ChannelEntry] = []
-    for e in entries:
-        if not e.group:
-            continue
-        code = _guess_country_code(e.group)
-        if code and code.upper() in codes_u:
-            out.append(e)
-    return out
+        scan_progress = _progress_tracker(self, app) if deep else None
+        write_progress = _progress_tracker(self, app)
+
+        def _work(token) -> tuple[list[SaveResult], list[str]]:
+            notes: list[str] = []
+            if combine:
+                expiries = [expiry for _, _, expiry in working if expiry]
+                if dedup:
+                    per_source = [filter_by_country_codes(entries, codes) for _, entries, _ in working]
+                    unique, report = dedup_playlists(per_source, probe_cache=app.iptv.probe_cache)
+                    notes.append(report.summary())
+                    rows = chain.from_iterable(unique)
+                else:
+                    rows = chain.from_iterable(iter_by_country_codes(entries, codes) for _, entries, _ in working)
+                jobs = [OutputJob(label=f"{label}_auto", entries=rows, expiry=min(expiries) if expiries else None)]
+            else:
+                jobs = [
+                    OutputJob(label=f"{label}_{i}", entries=lambda e=entries: filter_by_country_codes(e, codes), expiry=expiry)
+                    for i, (_, entries, expiry) in enumerate(working, start=1)
+                ]
+
+            if deep:
+                scanned: list[OutputJob] = []
+                for job in jobs:
+                    rows = job.rows()
+                    filtered = rows if isinstance(rows, Playlist) else Playlist.from_entries(rows)
+                    if not filtered:
+                        continue
+                    report = scan_liveness(app.iptv, filtered, on_progress=scan_progress, cancel=token)
+                    scanned.append(OutputJob(label=job.label, entries=drop_dead(filtered, report), expiry=job.expiry))
+                    notes.append(f"{job.label}: {_liveness_text(report)}")
+                jobs = scanned
+            return write_outputs(app.storage, jobs, ext, on_progress=write_progress, cancel=token), notes
+
+        app.root.status_text = "Çıktı hazırlanıyor"
+        app.tasks.submit(
+            _work,
+            key="output_auto.save",
+            on_done=lambda out: _show_saved(app, (scan_progress, write_progress), *out),
+            on_error=lambda e: app.show_error("Hata", str(e)),
+        )
+
+
+class SelectableRow(RecycleDataViewBehavior, MDBoxLayout):
+    text = StringProperty("")
+    key = StringProperty("")
+    active = BooleanProperty(False)
+    toggle = ObjectProperty(None, allownone=True)
+    index = -1
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_checkbox_release(self, value: bool) -> None:
+        self.active = value
+        if self.toggle:
+            self.toggle(self.index, self.key, value)
+
+
+def _set_row_active(rv, index: int, key: str, val: bool) -> None:
+    if 0 <= index < len(rv.data) and rv.data[index].get("key") == key:
+        rv.data[index]["active"] = val
+
+
+def _progress_tracker(screen: Screen, app) -> ProgressTracker:
+    screen.progress = 0.0
+    screen.eta_text = ""
+
+    def _ui(snap: ProgressSnapshot) -> None:
+        screen.progress = snap.progress
+        app.root.status_text = snap.message
+        screen.eta_text = snap.eta_text
+
+    return ProgressTracker(_ui)
+
+
+def _show_saved(
+    app, trackers: tuple[ProgressTracker | None, ...], results: list[SaveResult], notes: list[str]
+) -> None:
+    for tracker in trackers:
+        if tracker is not None:
+            tracker.close()
+    if not results:
+        app.show_error("Hata", "Seçili filtrelerde kanal bulunamadı.")
+        return
+    app.root.status_text = "\n".join([f"Kaydedildi: {r.file_path}" for r in results] + notes)
+
+
+def _liveness_text(report: LivenessReport) -> str:
+    text = report.summary()
+    weak = report.weakest(3)
+    if weak:
+        text += "\nZayıf gruplar: " + ", ".join(f"{g.group} %{g.ratio * 100:.0f}" for g in weak)
+    return text
 
 
 def _ext_from_ui(screen: Screen) -> str:
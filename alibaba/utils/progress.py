@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable
+
+Schedule = Callable[[Callable[[], None], float], None]
+
+_COUNTER_PREFIX_RE = re.compile(r"^\d+/\d+:\s*")
+_COUNTER_SUFFIX_RE = re.compile(r"\s*\d+(?:/\d+)?%?$")
+
+
+def kivy_schedule(fn: Callable[[], None], delay: float) -> None:
+    from kivy.clock import Clock
+
+    Clock.schedule_once(lambda *_: fn(), delay)
+
+
+def thread_schedule(fn: Callable[[], None], delay: float) -> None:
+    if delay <= 0:
+        fn()
+        return
+    t = threading.Timer(delay, fn)
+    t.daemon = True
+    t.start()
+
+
+def stage_of(msg: str) -> str:
+    return _COUNTER_SUFFIX_RE.sub("", _COUNTER_PREFIX_RE.sub("", msg)).strip()
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    progress: float
+    message: str
+    elapsed_s: float
+    rate: float | None = None
+    eta_s: float | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def eta_text(self) -> str:
+        if self.eta_s is None:
+            return ""
+        s = int(self.eta_s)
+        return f"~{s // 60} dk {s % 60} sn" if s >= 60 else f"~{s} sn"
+
+
+class ProgressMerger:
+    def __init__(self, total: int):
+        self.total = max(1, int(total))
+        self._fractions: dict[Hashable, float] = {}
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, worker: Hashable, p: float) -> float:
+        p = max(0.0, min(1.0, p))
+        with self._lock:
+            old = self._fractions.get(worker, 0.0)
+            if p > old:
+                self._fractions[worker] = p
+                self._sum += p - old
+            return self._sum / self.total
+
+    @property
+    def overall(self) -> float:
+        with self._lock:
+            return self._sum / self.total
+
+
+class EwmaRate:
+    def __init__(self, alpha: float = 0.3, min_interval_s: float = 0.25):
+        self.alpha = alpha
+        self.min_interval_s = min_interval_s
+        self.rate: float | None = None
+        self._t: float | None = None
+        self._p = 0.0
+
+    def update(self, t: float, p: float) -> float | None:
+        if self._t is None:
+            self._t, self._p = t, p
+            return self.rate
+        dt = t - self._t
+        if dt < self.min_interval_s:
+            return self.rate
+        inst = max(0.0, p - self._p) / dt
+        self.rate = inst if self.rate is None else self.alpha * inst + (1 - self.alpha) * self.rate
+        self._t, self._p = t, p
+        return self.rate
+
+    def eta(self, p: float) -> float | None:
+        if not self.rate or self.rate <= 0:
+            return None
+        return max(0.0, (1.0 - p) / self.rate)
+
+
+class ProgressTracker:
+    def __init__(
+        self,
+        apply: Callable[[ProgressSnapshot], None],
+        schedule: Schedule | None = None,
+        frame_s: float = 1 / 15,
+        alpha: float = 0.3,
+        total_workers: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.apply = apply
+        self.schedule = schedule or kivy_schedule
+        self.frame_s = frame_s
+        self.clock = clock
+        self.merger = ProgressMerger(total_workers) if total_workers else None
+        self._rate = EwmaRate(alpha=alpha)
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._progress = 0.0
+        self._message = ""
+        self._open: dict[Hashable, tuple[str, float]] = {}
+        self._stages: dict[str, float] = {}
+        self._scheduled = False
+        self._closed = False
+        self._next_at = 0.0
+        self.events = 0
+        self.dispatched = 0
+
+    def __call__(self, p: float, msg: str) -> None:
+        self.report(p, msg)
+
+    def worker(self, key: Hashable) -> Callable[[float, str], None]:
+        return lambda p, msg: self.report(p, msg, worker=key)
+
+    def report(self, p: float, msg: str, worker: Hashable = None, done: bool = False) -> None:
+        now = self.clock()
+        if self.merger is not None:
+            p = self.merger.update(worker, p)
+        stage = stage_of(msg)
+        with self._lock:
+            self.events += 1
+            self._progress = max(self._progress, max(0.0, min(1.0, p)))
+            self._message = msg
+            self._rate.update(now - self._started, self._progress)
+            cur = self._open.get(worker)
+            if cur is None or cur[0] != stage:
+                if cur is not None:
+                    self._stages[cur[0]] = self._stages.get(cur[0], 0.0) + now - cur[1]
+                self._open[worker] = (stage, now)
+                self._stages.setdefault(stage, 0.0)
+            if done:
+                stage, since = self._open.pop(worker)
+                self._stages[stage] += now - since
+            if self._scheduled or self._closed:
+                return
+            self._scheduled = True
+            delay = max(0.0, self._next_at - now)
+        self.schedule(self._flush, delay)
+
+    def _snapshot_locked(self, now: float) -> ProgressSnapshot:
+        stages = dict(self._stages)
+        for stage, since in self._open.values():
+            stages[stage] = stages.get(stage, 0.0) + now - since
+        return ProgressSnapshot(
+            progress=self._progress,
+            message=self._message,
+            elapsed_s=now - self._started,
+            rate=self._rate.rate,
+            eta_s=self._rate.eta(self._progress) if self._progress < 1.0 else 0.0,
+            stages=stages,
+        )
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            return self._snapshot_locked(self.clock())
+
+    def _flush(self) -> None:
+        now = self.clock()
+        with self._lock:
+            self._scheduled = False
+            if self._closed:
+                return
+            self._next_at = now + self.frame_s
+            self.dispatched += 1
+            snap = self._snapshot_locked(now)
+        self.apply(snap)
+
+    def finish(self) -> ProgressSnapshot:
+        now = self.clock()
+        with self._lock:
+            for stage, since in self._open.values():
+                self._stages[stage] = self._stages.get(stage, 0.0) + now - since
+            self._open.clear()
+            snap = self._snapshot_locked(now)
+        return snap
+
+    def close(self) -> ProgressSnapshot:
+        snap = self.finish()
+        with self._lock:
+            closed, self._closed = self._closed, True
+        if not closed:
+            self.apply(snap)
+        return snap
+
+    @property
+    def stages(self) -> dict[str, float]:
+        return self.snapshot().stages
@@ -1,18 +1,180 @@
 from __future__ import annotations
 
+import itertools
 import threading
-from typing import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, TypeVar
 
-from kivy.clock import Clock
+T = TypeVar("T")
+Dispatch = Callable[[Callable[[], None]], None]
 
 
-def run_in_thread(fn: Callable[[], None], on_error: Callable[[Exception], None] | None = None) -> None:
-    def _runner():
-        try:
-            fn()
-        except Exception as e:  # noqa: BLE001
-            if on_error:
-                Clock.schedule_once(lambda *_: on_error(e), 0)
+class TaskCancelled(Exception):
+    pass
 
-    t = threading.Thread(target=_runner, daemon=True)
-    t.start()
+
+class CancelToken(threading.Event):
+    def cancel(self) -> None:
+        self.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_set():
+            raise TaskCancelled("İptal edildi")
+
+
+def check_cancelled(cancel: threading.Event | None) -> None:
+    if cancel is not None and cancel.is_set():
+        raise TaskCancelled("İptal edildi")
+
+
+def cancellable(items: Iterable[T], cancel: threading.Event | None, every: int = 4096) -> Iterator[T]:
+    if cancel is None:
+        yield from items
+        return
+    for n, item in enumerate(items):
+        if n % every == 0 and cancel.is_set():
+            raise TaskCancelled("İptal edildi")
+        yield item
+
+
+def kivy_dispatch(fn: Callable[[], None]) -> None:
+    from kivy.clock import Clock
+
+    Clock.schedule_once(lambda *_: fn(), 0)
+
+
+def direct_dispatch(fn: Callable[[], None]) -> None:
+    fn()
+
+
+class TaskHandle:
+    def __init__(self, task_id: int, key: str | None, token: CancelToken):
+        self.task_id = task_id
+        self.key = key
+        self.token = token
+        self.future: Future | None = None
+
+    def cancel(self) -> None:
+        self.token.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class TaskScheduler:
+    def __init__(self, max_workers: int = 4, dispatch: Dispatch | None = None):
+        self.max_workers = max(1, int(max_workers))
+        self.dispatch = dispatch or kivy_dispatch
+        self._ex = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="alibaba-task")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tasks: dict[int, TaskHandle] = {}
+        self._by_key: dict[str, TaskHandle] = {}
+
+    def submit(
+        self,
+        fn: Callable[[CancelToken], T],
+        key: str | None = None,
+        on_done: Callable[[T], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> TaskHandle:
+        handle = TaskHandle(next(self._ids), key, CancelToken())
+        with self._lock:
+            if key is not None:
+                prev = self._by_key.get(key)
+                if prev is not None:
+                    prev.cancel()
+                self._by_key[key] = handle
+            self._tasks[handle.task_id] = handle
+
+        def _deliver(cb: Callable[[Any], None], value: Any) -> None:
+            def _ui() -> None:
+                if not handle.token.is_set():
+                    cb(value)
+
+            self.dispatch(_ui)
+
+        def _runner() -> None:
+            try:
+                if handle.token.is_set():
+                    return
+                result = fn(handle.token)
+                if on_done and not handle.token.is_set():
+                    _deliver(on_done, result)
+            except TaskCancelled:
+                pass
+            except Exception as e:  # noqa: BLE001
+                if on_error and not handle.token.is_set():
+                    _deliver(on_error, e)
+            finally:
+                self._forget(handle)
+
+        handle.future = self._ex.submit(_runner)
+        handle.future.add_done_callback(lambda f: self._forget(handle) if f.cancelled() else None)
+        return handle
+
+    def _forget(self, handle: TaskHandle) -> None:
+        with self._lock:
+            self._tasks.pop(handle.task_id, None)
+            if handle.key is not None and self._by_key.get(handle.key) is handle:
+                del self._by_key[handle.key]
+
+    def get(self, task_id: int) -> TaskHandle | None:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def running(self, key: str) -> bool:
+        with self._lock:
+            return key in self._by_key
+
+    def cancel(self, task_id: int) -> bool:
+        handle = self.get(task_id)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def cancel_key(self, key: str) -> bool:
+        with self._lock:
+            handle = self._by_key.get(key)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            handles = list(self._tasks.values())
+        for h in handles:
+            h.cancel()
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.cancel_all()
+        self._ex.shutdown(wait=wait, cancel_futures=True)
+
+
+_default: TaskScheduler | None = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler() -> TaskScheduler:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TaskScheduler()
+        return _default
+
+
+def run_in_thread(fn: Callable[[], None], on_error: Callable[[Exception], None] | None = None) -> TaskHandle:
+    return default_scheduler().submit(lambda _token: fn(), on_error=on_error)
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import group_names, iter_playlist_lines, url_dump
+
+from alibaba.services.country import guess_country_code
+from alibaba.services.dedup import dedup_playlists
+from alibaba.services.m3u import filter_by_country_codes, filter_by_groups, parse_m3u_plus_lines, write_m3u_plus
+from alibaba.services.url_finder import extract_urls
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+@dataclass
+class CaseResult:
+    case: str
+    size: str
+    items: int
+    best_s: float
+    throughput: float
+    peak_mb: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.size}"
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[int], object]
+    run: Callable[[object], int]
+    per_op: bool = False
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[k]
+
+
+def _measure(case: Case, n: int, size: str, repeats: int) -> CaseResult:
+    state = case.setup(n)
+    timings: list[float] = []
+    latencies: list[float] = []
+    items = 0
+    for _ in range(repeats):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = case.run(state)
+        dt = time.perf_counter() - t0
+        if case.per_op:
+            items, lat = out
+            latencies.extend(lat)
+        else:
+            items = out
+            latencies.append(dt)
+        timings.append(dt)
+
+    gc.collect()
+    tracemalloc.start()
+    case.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return CaseResult(
+        case=case.name,
+        size=size,
+        items=items,
+        best_s=best,
+        throughput=items / best if best > 0 else 0.0,
+        peak_mb=peak / (1024 * 1024),
+        p50_ms=_percentile(latencies, 0.50) * 1000,
+        p95_ms=_percentile(latencies, 0.95) * 1000,
+        p99_ms=_percentile(latencies, 0.99) * 1000,
+    )
+
+
+class _NullWriter:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk: str) -> int:
+        self.size += len(chunk)
+        return len(chunk)
+
+
+def _lines(n: int) -> list[str]:
+    return list(iter_playlist_lines(n))
+
+
+def _parsed(n: int):
+    return parse_m3u_plus_lines(iter_playlist_lines(n))
+
+
+def _run_country(pl) -> int:
+    values = pl.groups.values
+    for gid in pl.group_ids:
+        guess_country_code(values[gid])
+    return len(pl)
+
+
+def _mirrors(n: int) -> list:
+    hosts = ("http://a.example.com", "http://b.example.com:8080", "http://c.example.com")
+    return [parse_m3u_plus_lines(iter_playlist_lines(max(1, n // len(hosts)), host=h)) for h in hosts]
+
+
+def _local_cases() -> list[Case]:
+    return [
+        Case("parse", _lines, lambda lines: len(parse_m3u_plus_lines(lines))),
+        Case("build", _parsed, lambda pl: (write_m3u_plus(pl, _NullWriter()), len(pl))[1]),
+        Case(
+            "filter_groups",
+            lambda n: (_parsed(n), set(group_names(300)[:10])),
+            lambda st: (filter_by_groups(st[0], st[1]), len(st[0]))[1],
+        ),
+        Case(
+            "filter_country",
+            _parsed,
+            lambda pl: (filter_by_country_codes(pl, {"TR", "DE"}), len(pl))[1],
+        ),
+        Case("country_code", _parsed, _run_country),
+        Case("dedup", _mirrors, lambda pls: (dedup_playlists(pls), sum(len(pl) for pl in pls))[1]),
+        Case(
+            "extract_urls",
+            lambda n: url_dump(max(10, min(n // 10, 100_000))),
+            lambda text: len(extract_urls(text)),
+        ),
+    ]
+
+
+def _network_cases(server) -> list[Case]:
+    from alibaba.services.iptv import IPTVService
+
+    def _fetch_setup(n: int):
+        url = server.url(f"/playlist/{n}.m3u")
+        server.playlist(n, 300)
+        return IPTVService(), url
+
+    def _probe_setup(n: int):
+        count = max(20, min(n // 100, 500))
+        return IPTVService(), [server.url(f"/live/user/pass/{i}.ts") for i in range(count)]
+
+    def _probe_run(st):
+        iptv, urls = st
+        lat: list[float] = []
+
+        def _timed(u: str) -> None:
+            t0 = time.perf_counter()
+            iptv.probe_stream(u, timeout_s=5)
+            lat.append(time.perf_counter() - t0)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            list(ex.map(_timed, urls))
+        return len(urls), lat
+
+    def _probe_async_setup(n: int):
+        count = max(20, min(n // 100, 500))
+        return IPTVService(backend="asyncio"), [server.url(f"/live/user/pass/{i}.ts") for i in range(count)]
+
+    def _probe_async_run(st):
+        iptv, urls = st
+        res = iptv.probe_streams(urls, timeout_s=5, stop_after_ok=None)
+        return len(urls), [pr.latency_s for pr in res if pr is not None and pr.latency_s is not None]
+
+    def _xtream_setup(n: int):
+        server.xtream_channels = n
+        return IPTVService(), server.url("/get.php?username=user&password=pass&type=m3u_plus&output=ts"), n
+
+    def _xtream_run(st) -> int:
+        iptv, url, n = st
+        iptv.analyze_playlist(url, test_channels=1, xtream=True)
+        return n
+
+    def _mirrors_setup(n: int):
+        server.playlist(n, 300)
+        return IPTVService(), [server.url(f"/playlist/{n}.m3u?mirror={i}") for i in range(4)], n
+
+    def _mirrors_run(st) -> int:
+        iptv, urls, n = st
+        iptv.analyze_many(urls, max_workers=4, per_host=4)
+        return n * len(urls)
+
+    return [
+        Case("fetch", _fetch_setup, lambda st: len(st[0].fetch_entries(st[1]))),
+        Case("validate_mirrors", _mirrors_setup, _mirrors_run),
+        Case("xtream_analyze", _xtream_setup, _xtream_run),
+        Case("probe", _probe_setup, _probe_run, per_op=True),
+        Case("probe_async", _probe_async_setup, _probe_async_run, per_op=True),
+    ]
+
+
+def _compare(results: list[CaseResult], baseline: dict, tolerance: float) -> list[str]:
+    problems: list[str] = []
+    for r in results:
+        base = baseline.get("results", {}).get(r.key)
+        if not base:
+            continue
+        if base["throughput"] and r.throughput < base["throughput"] * (1 - tolerance):
+            problems.append(f"{r.key}: throughput {r.throughput:,.0f}/s < baseline {base['throughput']:,.0f}/s")
+        if base["peak_mb"] and r.peak_mb > base["peak_mb"] * (1 + tolerance) + 0.5:
+            problems.append(f"{r.key}: peak {r.peak_mb:.1f} MB > baseline {base['peak_mb']:.1f} MB")
+    return problems
+
+
+def _print_table(results: list[CaseResult], baseline: dict | None) -> None:
+    head = f"{'case':<16}{'size':>6}{'items/s':>14}{'best ms':>10}{'peak MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    if baseline:
+        head += f"{'vs base':>9}"
+    print(head)
+    for r in results:
+        line = (
+            f"{r.case:<16}{r.size:>6}{r.throughput:>14,.0f}{r.best_s * 1000:>10.1f}"
+            f"{r.peak_mb:>9.1f}{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}"
+        )
+        if baseline:
+            base = baseline.get("results", {}).get(r.key)
+            if base and base["throughput"]:
+                line += f"{(r.throughput / base['throughput'] - 1) * 100:>+8.0f}%"
+            else:
+                line += f"{'-':>9}"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="benchmarks.run", description="AliBaba benchmark paketi")
+    p.add_argument("--sizes", default="1k,100k", help="virgülle: 1k,100k,1m")
+    p.add_argument("--cases", default=None, help="yalnızca bu case'ler (virgülle)")
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--no-network", action="store_true", help="fetch/probe case'lerini atla")
+    p.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--tolerance", type=float, default=0.25)
+    p.add_argument("--json", default=None, help="sonuçları bu dosyaya yaz")
+    args = p.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    for s in sizes:
+        if s not in SIZES:
+            p.error(f"bilinmeyen boyut: {s}")
+    only = {c.strip() for c in args.cases.split(",")} if args.cases else None
+
+    server = None
+    cases = _local_cases()
+    if not args.no_network:
+        from benchmarks.server import StandInServer
+
+        server = StandInServer(dead_every=7).start()
+        cases += _network_cases(server)
+
+    results: list[CaseResult] = []
+    try:
+        for size in sizes:
+            n = SIZES[size]
+            repeats = 1 if n >= 1_000_000 else args.repeats
+            for case in cases:
+                if only and case.name not in only:
+                    continue
+                results.append(_measure(case, n, size, repeats))
+    finally:
+        if server is not None:
+            server.stop()
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    _print_table(results, baseline)
+
+    payload = {
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "results": {r.key: asdict(r) for r in results},
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        if baseline_path.exists():
+            old = json.loads(baseline_path.read_text(encoding="utf-8"))
+            payload["results"] = {**old.get("results", {}), **payload["results"]}
+        baseline_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"baseline kaydedildi: {baseline_path}")
+        return 0
+
+    if baseline:
+        problems = _compare(results, baseline, args.tolerance)
+        for msg in problems:
+            print(f"REGRESYON {msg}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
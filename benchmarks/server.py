@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.synthetic import playlist_text, xtream_catalog
+
+_PLAYLIST_RE = re.compile(r"^/playlist/(?P<n>\d+)\.m3u$")
+_STREAM_RE = re.compile(r"^/live/[^/]+/[^/]+/(?P<id>\d+)\.ts$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None, head: bool = False) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head:
+            self.wfile.write(body)
+
+    def _route(self, head: bool) -> None:
+        srv = self.server
+        if srv.latency_s:
+            time.sleep(srv.latency_s)
+        u = urlsplit(self.path)
+        qs = parse_qs(u.query)
+
+        m = _PLAYLIST_RE.match(u.path)
+        if m:
+            n = int(m.group("n"))
+            groups = int(qs.get("groups", ["300"])[0])
+            body, etag = srv.playlist(n, groups)
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, headers={"ETag": etag}, head=head)
+                return
+            headers = {
+                "Content-Type": "audio/x-mpegurl; charset=utf-8",
+                "ETag": etag,
+                "Last-Modified": srv.last_modified,
+            }
+            if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                body = srv.gzipped(etag, body)
+                headers["Content-Encoding"] = "gzip"
+            self._send(200, body, headers, head=head)
+            return
+
+        if u.path in ("/get.php", "/player_api.php"):
+            user, password = qs.get("username", [""])[0], qs.get("password", [""])[0]
+            if srv.xtream_accounts.get(user) != password:
+                self._send(401 if u.path == "/get.php" else 200, b'{"user_info":{"auth":0}}', head=head)
+                return
+            if u.path == "/get.php":
+                body, _ = srv.playlist(srv.xtream_channels, srv.xtream_groups)
+                self._send(200, body, {"Content-Type": "audio/x-mpegurl; charset=utf-8"}, head=head)
+                return
+            body = srv.xtream_api(user, qs.get("action", [""])[0], qs.get("category_id", [""])[0])
+            self._send(200, body, {"Content-Type": "application/json"}, head=head)
+            return
+
+        m = _STREAM_RE.match(u.path)
+        if m:
+            i = int(m.group("id"))
+            if srv.dead_every and i % srv.dead_every == 0:
+                self._send(404, head=head)
+                return
+            self._send(200, b"\x47" * 2048, {"Content-Type": "video/mp2t"}, head=head)
+            return
+
+        self._send(404, head=head)
+
+    def do_GET(self):  # noqa: N802
+        self._route(head=False)
+
+    def do_HEAD(self):  # noqa: N802
+        self._route(head=True)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_s: float = 0.0,
+        dead_every: int = 0,
+        xtream_channels: int = 10_000,
+        xtream_groups: int = 300,
+    ):
+        super().__init__((host, port), _Handler)
+        self.latency_s = latency_s
+        self.dead_every = dead_every
+        self.xtream_channels = xtream_channels
+        self.xtream_groups = xtream_groups
+        self.xtream_accounts = {"user": "pass"}
+        self.xtream_exp_date = int(time.time()) + 30 * 86400
+        self._xtream: dict[tuple[int, int], tuple[list[dict], dict[str, list[dict]]]] = {}
+        self.last_modified = formatdate(usegmt=True)
+        self._lock = threading.Lock()
+        self._playlists: dict[tuple[int, int], tuple[bytes, str]] = {}
+        self._gzipped: dict[str, bytes] = {}
+        self._thread: threading.Thread | None = None
+
+    def handle_error(self, request, client_address) -> None:
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def playlist(self, n: int, groups: int) -> tuple[bytes, str]:
+        key = (n, groups)
+        with self._lock:
+            hit = self._playlists.get(key)
+            if hit is None:
+                body = playlist_text(n, groups=groups, host=self.base_url).encode("utf-8")
+                hit = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+                self._playlists[key] = hit
+            return hit
+
+    def xtream_api(self, user: str, action: str, category_id: str) -> bytes:
+        key = (self.xtream_channels, self.xtream_groups)
+        with self._lock:
+            hit = self._xtream.get(key)
+            if hit is None:
+                hit = self._xtream[key] = xtream_catalog(key[0], groups=key[1])
+            categories, streams = hit
+        if action == "get_live_categories":
+            data: object = categories
+        elif action == "get_live_streams":
+            if category_id:
+                data = streams.get(category_id, [])
+            else:
+                data = [s for c in categories for s in streams[c["category_id"]]]
+        elif action:
+            data = []
+        else:
+            host, port = self.server_address[:2]
+            data = {
+                "user_info": {
+                    "username": user,
+                    "auth": 1,
+                    "status": "Active",
+                    "exp_date": str(self.xtream_exp_date),
+                    "is_trial": "0",
+                    "max_connections": "1",
+                },
+                "server_info": {"url": host, "port": str(port), "server_protocol": "http"},
+            }
+        return json.dumps(data).encode("utf-8")
+
+    def gzipped(self, etag: str, body: bytes) -> bytes:
+        with self._lock:
+            z = self._gzipped.get(etag)
+            if z is None:
+                z = self._gzipped[etag] = gzip.compress(body, compresslevel=5)
+            return z
+
+    def start(self) -> StandInServer:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> StandInServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
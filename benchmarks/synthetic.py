@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+from typing import Iterator
+
+_COUNTRIES = ["TR", "DE", "RO", "UK", "FR", "NL", "IT", "ES", "PL", "AR", "US", "AL"]
+_KINDS = ["Ulusal", "Spor", "Haber", "Belgesel", "Cocuk", "Muzik", "Film", "Dizi", "VOD", "4K"]
+
+
+def group_names(count: int, seed: int = 1) -> list[str]:
+    rnd = random.Random(seed)
+    out: list[str] = []
+    for i in range(count):
+        c = _COUNTRIES[i % len(_COUNTRIES)]
+        k = _KINDS[(i // len(_COUNTRIES)) % len(_KINDS)]
+        sep = rnd.choice([" | ", " - ", ": ", "_", " "])
+        out.append(f"{c}{sep}{k} {i}")
+    return out
+
+
+def iter_channels(n: int, groups: int = 300, seed: int = 1) -> Iterator[tuple[int, int, str]]:
+    rnd = random.Random(seed)
+    names = group_names(groups, seed=seed)
+    for i in range(n):
+        k = rnd.randrange(len(names))
+        yield i, k, names[k]
+
+
+def iter_playlist_lines(
+    n: int,
+    groups: int = 300,
+    host: str = "http://panel.example.com:8080",
+    seed: int = 1,
+) -> Iterator[str]:
+    yield '#EXTM3U url-tvg="http://epg.example.com/guide.xml"'
+    for i, _, g in iter_channels(n, groups=groups, seed=seed):
+        yield (
+            f'#EXTINF:-1 tvg-id="ch{i}.{g[:2].lower()}" tvg-name="{g[:2]}: Channel {i}" '
+            f'tvg-logo="http://logo.example.com/picons/{i}.png" group-title="{g}",{g[:2]}: Channel {i}'
+        )
+        yield f"{host}/live/user/pass/{i}.ts"
+
+
+def playlist_text(n: int, groups: int = 300, host: str = "http://panel.example.com:8080", seed: int = 1) -> str:
+    return "\n".join(iter_playlist_lines(n, groups=groups, host=host, seed=seed)) + "\n"
+
+
+def xtream_catalog(n: int, groups: int = 300, seed: int = 1) -> tuple[list[dict], dict[str, list[dict]]]:
+    names = group_names(groups, seed=seed)
+    categories = [{"category_id": str(k + 1), "category_name": g, "parent_id": 0} for k, g in enumerate(names)]
+    streams: dict[str, list[dict]] = {c["category_id"]: [] for c in categories}
+    for i, k, g in iter_channels(n, groups=groups, seed=seed):
+        cid = str(k + 1)
+        streams[cid].append(
+            {
+                "num": i + 1,
+                "name": f"{g[:2]}: Channel {i}",
+                "stream_type": "live",
+                "stream_id": i,
+                "stream_icon": f"http://logo.example.com/picons/{i}.png",
+                "epg_channel_id": f"ch{i}.{g[:2].lower()}",
+                "category_id": cid,
+            }
+        )
+    return categories, streams
+
+
+def url_dump(n: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    parts: list[str] = []
+    for i in range(n):
+        host = f"panel{rnd.randrange(max(1, n // 4))}.example.com"
+        user = f"user{rnd.randrange(max(1, n // 2))}"
+        kind = rnd.choice(["m3u_plus", "m3u"])
+        url = f"http://{host}:8080/get.php?username={user}&password=p{i % 97}&type={kind}&output=ts"
+        noise = rnd.choice(["", "Link: ", "✅ ", "EXP 2026-12-01 ", "-> "])
+        tail = rnd.choice(["", ".", ",", ")", " 🔥"])
+        parts.append(f"{noise}{url}{tail}")
+        if i % 5 == 0:
+            parts.append("lorem ipsum dolor sit amet " * 3)
+    return "\n".join(parts)
@@ -129,6 +129,8 @@ from kivymd.uix.button import MDFlatButton
 from alibaba.app_state import AppState
 from alibaba.services.storage import StorageService
 from alibaba.services.iptv import IPTVService
+from alibaba.services.metrics import MetricsLog, metrics_enabled
+from alibaba.utils.threading import TaskScheduler
 from alibaba.ui import screens as _screens  # noqa: F401
 
 
@@ -140,8 +142,14 @@ class AliBabaApp(MDApp):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.state = AppState()
-        self.iptv = IPTVService()
         self.storage = StorageService(app_name="AliBaba")
+        metrics_log = MetricsLog(_crash_private_dir() / "crash_logs" / "alibaba_metrics.jsonl") if metrics_enabled() else None
+        self.iptv = IPTVService(
+            cache=self.storage.playlist_cache(),
+            probe_cache=self.storage.probe_cache(),
+            metrics_log=metrics_log,
+        )
+        self.tasks = TaskScheduler(max_workers=4)
         self._dialog: MDDialog | None = None
 
     def build(self):
@@ -169,6 +177,11 @@ class AliBabaApp(MDApp):
     def _wire(self, root: Root):
         self.root = root
 
+    def on_stop(self):
+        self.tasks.shutdown()
+        if self.iptv.probe_cache is not None:
+            self.iptv.probe_cache.save()
+
     def show_error(self, title: str, text: str):
         if self._dialog:
             self._dialog.dismiss()